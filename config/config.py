@@ -8,6 +8,13 @@ from dotenv import load_dotenv
 # Load environment variables from .env file if it exists
 load_dotenv()
 
+# OpenRouter model names
+_OPENROUTER_MODELS = {
+    'gpt-4o-mini': 'openai/gpt-4o-mini',
+    'gpt-4o': 'openai/gpt-4o',
+    'whisper-1': 'openai/whisper-1'
+}
+
 
 class Config:
     """Application configuration."""
@@ -28,13 +35,7 @@ class Config:
     def get_model_name(cls, base_model: str) -> str:
         """Get the correct model name based on provider."""
         if cls.USE_OPENROUTER:
-            # OpenRouter model names
-            model_map = {
-                'gpt-4o-mini': 'openai/gpt-4o-mini',
-                'gpt-4o': 'openai/gpt-4o',
-                'whisper-1': 'openai/whisper-1'
-            }
-            return model_map.get(base_model, base_model)
+            return _OPENROUTER_MODELS.get(base_model, base_model)
         return base_model
     
     @classmethod
@@ -61,6 +62,11 @@ class Config:
     # - sentence-transformers/all-MiniLM-L6-v2 (384 dim, fast, good quality) [DEFAULT]
     # - sentence-transformers/all-MiniLM-L12-v2 (384 dim, better quality)
     # - sentence-transformers/all-mpnet-base-v2 (768 dim, best quality, slower)
+    # Compile the HuggingFace encoder with torch.compile: faster steady-state inference
+    # for long-running processes, at the cost of a slow first call
+    EMBEDDING_TORCH_COMPILE: bool = os.getenv('EMBEDDING_TORCH_COMPILE', 'false').lower() == 'true'
+    # HuggingFace encoder precision: 'fp32', 'bf16' (autocast over fp32 weights), or 'int8' (dynamic quantization, CPU only)
+    EMBEDDING_DTYPE: str = os.getenv('EMBEDDING_DTYPE', 'fp32').lower()
     
     # Guardrails Configuration
     ENABLE_GUARDRAILS: bool = os.getenv('ENABLE_GUARDRAILS', 'true').lower() == 'true'
@@ -84,6 +90,11 @@ class Config:
     MEMORY_CACHE_SIZE: int = int(os.getenv('MEMORY_CACHE_SIZE', '100'))
     MEMORY_CACHE_TTL: int = int(os.getenv('MEMORY_CACHE_TTL', '3600'))  # 1 hour default
     
+    # Resource Cleanup Configuration
+    # Stat/unlink old files on a thread pool when cleaning large directories;
+    # helps on NFS/SMB mounts, neutral or slower on local disks
+    RESOURCE_MGR_PARALLEL: bool = os.getenv('RESOURCE_MGR_PARALLEL', 'false').lower() in ('1', 'true')
+    
     # Flask settings
     SECRET_KEY = os.getenv('SECRET_KEY', os.urandom(24).hex())
     UPLOAD_FOLDER = 'uploads'
@@ -54,14 +54,17 @@ def setup_database():
             raw_text TEXT,
             labels JSONB,
             metadata JSONB,
-            embedding vector(1536),
+            embedding halfvec(1536),
             quality_score FLOAT,
             processing_time FLOAT,
+            content_hash BYTEA,
             created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
             updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
         );
         """
         cursor.execute(create_table_sql)
+        # Tables created before content hashing was added need the column too
+        cursor.execute("ALTER TABLE data_labeling_embeddings ADD COLUMN IF NOT EXISTS content_hash BYTEA;")
         print("[OK] Table created successfully")
         
         # Create indexes
@@ -82,18 +85,50 @@ def setup_database():
             except Exception as e:
                 print(f"  [WARNING] Could not create {idx_name}: {str(e)}")
         
-        # Create vector index (may fail if table is empty, that's OK)
+        # Tables created with full-precision vector(1536) embeddings are converted
+        # to halfvec(1536), which halves storage and index size
+        cursor.execute("""
+            SELECT format_type(atttypid, atttypmod)
+            FROM pg_attribute
+            WHERE attrelid = 'data_labeling_embeddings'::regclass AND attname = 'embedding';
+        """)
+        if cursor.fetchone()[0] == 'vector(1536)':
+            try:
+                cursor.execute("DROP INDEX IF EXISTS embeddings_vector_idx;")
+                cursor.execute("DROP INDEX IF EXISTS embeddings_image_vector_idx;")
+                cursor.execute("""
+                    ALTER TABLE data_labeling_embeddings
+                    ALTER COLUMN embedding TYPE halfvec(1536) USING embedding::halfvec(1536);
+                """)
+                print("  [OK] Converted embedding column to halfvec(1536)")
+            except Exception as e:
+                print(f"  [WARNING] Could not convert embedding column to halfvec: {str(e)}")
+        
+        # Create vector index (HNSW; search_similar tunes it via hnsw.ef_search)
         try:
             cursor.execute("""
                 CREATE INDEX IF NOT EXISTS embeddings_vector_idx 
                 ON data_labeling_embeddings 
-                USING ivfflat (embedding vector_cosine_ops)
-                WITH (lists = 100);
+                USING hnsw (embedding halfvec_cosine_ops);
             """)
             print("  [OK] Created vector similarity index")
         except Exception as e:
-            print(f"  [INFO] Vector index creation skipped (normal if table is empty): {str(e)}")
-            print("         The index will be created automatically when you insert data")
+            print(f"  [WARNING] Could not create vector index: {str(e)}")
+            print("         halfvec HNSW indexes require pgvector 0.7.0 or later")
+        
+        # Image-only vector index: with a modality filter, the full index is
+        # post-filtered and can run out of candidates, while this one only
+        # holds image rows (search_similar's modality='image' matches it)
+        try:
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS embeddings_image_vector_idx 
+                ON data_labeling_embeddings 
+                USING hnsw (embedding halfvec_cosine_ops)
+                WHERE modality = 'image';
+            """)
+            print("  [OK] Created image vector similarity index")
+        except Exception as e:
+            print(f"  [WARNING] Could not create image vector index: {str(e)}")
         
         # Create trigger function and trigger
         print("\nCreating trigger for updated_at...")
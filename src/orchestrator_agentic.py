@@ -4,9 +4,11 @@ Agentic Orchestrator - True agentic system with autonomous agents
 import os
 import sys
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, Any, Optional
 from datetime import datetime
+from functools import lru_cache
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -27,6 +29,10 @@ from utils.cache import ResultCache
 
 logger = get_system_logger()
 
+# Worker threads for embedding storage (embedding request + database write),
+# so it overlaps the local output and experience writes
+_EMBEDDING_STORE_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix='embedding-store')
+
 
 class AgenticOrchestrator:
     """
@@ -185,13 +191,21 @@ class AgenticOrchestrator:
         
         return supervisor
     
-    def process_file(self, file_path: str, output_dir: str = 'output') -> Dict[str, Any]:
+    def process_file(
+        self,
+        file_path: str,
+        output_dir: str = 'output',
+        embedding_only: bool = False
+    ) -> Dict[str, Any]:
         """
         Process a file using the agentic system.
         
         Args:
             file_path: Path to file to process
             output_dir: Output directory for results
+            embedding_only: Only extract content and store its embedding, skipping
+                            planning, labeling and quality scoring (labels are empty
+                            and quality_score is 0.0)
             
         Returns:
             Processing result
@@ -202,6 +216,9 @@ class AgenticOrchestrator:
         
         start_time = datetime.now()
         
+        if embedding_only:
+            return self._process_embedding_only(file_path, start_time)
+        
         # Check cache before processing
         if self.result_cache:
             try:
@@ -277,26 +294,7 @@ class AgenticOrchestrator:
                 result['quality_score'] = result.get('quality_check', {}).get('quality_score', 0.0)
             
             # Apply guardrails validation
-            if self.guardrails:
-                try:
-                    is_valid, violations, sanitized_result = self.guardrails.validate_output(result)
-                    
-                    if not is_valid:
-                        logger.warning("Guardrail violations detected",
-                                     violations=violations,
-                                     violation_count=len(violations))
-                        result = sanitized_result
-                        result['guardrail_passed'] = False
-                    else:
-                        result['guardrail_passed'] = True
-                        logger.info("Guardrails validation passed")
-                except Exception as e:
-                    logger.error("Guardrails validation error", error=str(e))
-                    # Continue without guardrails if validation fails
-                    result['guardrail_passed'] = None
-                    result['guardrail_error'] = str(e)
-            else:
-                result['guardrail_passed'] = None
+            result = self._apply_guardrails(result)
             
             # Store result in cache (after successful processing)
             if self.result_cache and result.get('success', False):
@@ -309,6 +307,11 @@ class AgenticOrchestrator:
                 except Exception as e:
                     logger.warning("Failed to store result in cache", error=str(e))
             
+            # Store the embedding in the background while experience and output are written
+            embedding_future = None
+            if result.get('success', False):
+                embedding_future = _EMBEDDING_STORE_POOL.submit(self._store_embedding, result, file_path)
+            
             # Store experience for learning (with more context for better similarity matching)
             experience_data = {
                 'task': task,
@@ -330,30 +333,10 @@ class AgenticOrchestrator:
             # Save output
             if result.get('success', False):
                 self._save_output(result, output_dir)
-                
-                # Store embedding in database
-                if self.embedding_db:
-                    try:
-                        # Generate unique file_id from file_path or use existing identifier
-                        file_id = result.get('file_id') or os.path.splitext(
-                            os.path.basename(file_path)
-                        )[0] if file_path else str(uuid.uuid4())
-                        
-                        # Store embedding
-                        embedding_stored = self.embedding_db.store_embedding(
-                            file_id=file_id,
-                            file_name=result.get('file_name', os.path.basename(file_path) if file_path else 'unknown'),
-                            output_data=result,
-                            file_path=file_path
-                        )
-                        
-                        if embedding_stored:
-                            logger.info("Output stored as embedding in database", file_id=file_id)
-                        else:
-                            logger.warning("Failed to store embedding in database", file_id=file_id)
-                    except Exception as e:
-                        logger.error("Error storing embedding", error=str(e))
-                        # Don't fail the whole process if embedding storage fails
+            
+            # Callers expect the embedding to be stored once the result is returned
+            if embedding_future is not None:
+                embedding_future.result()
             
             # Log statistics
             self._log_statistics(processing_time)
@@ -372,6 +355,122 @@ class AgenticOrchestrator:
                 'success': False
             }
     
+    def _process_embedding_only(self, file_path: str, start_time: datetime) -> Dict[str, Any]:
+        """
+        Detect modality, extract content and store the embedding, without any labeling.
+        
+        Args:
+            file_path: Path to file to process
+            start_time: When processing started
+            
+        Returns:
+            Processing result with empty labels and a 0.0 quality score
+        """
+        from agents.agents.router_agent import RouterAgent
+        from agents.agents.content_extractor_agent import ContentExtractorAgent
+        
+        file_name = os.path.basename(file_path)
+        try:
+            modality = RouterAgent().classify_modality(file_path)['modality']
+            extractor = ContentExtractorAgent(
+                deepseek_api_key=self.deepseek_api_key,
+                openai_api_key=self.openai_api_key
+            )
+            if modality == 'image':
+                extraction = extractor.extract_image(file_path)
+            elif modality == 'audio':
+                extraction = extractor.extract_audio(file_path)
+            elif modality == 'text_document':
+                extraction = extractor.extract_text_document(file_path)
+            else:
+                extraction = {'success': False, 'error': f"Unsupported file type: {file_name}"}
+            
+            end_time = datetime.now()
+            result = {
+                'file_name': file_name,
+                'modality': modality,
+                'raw_text': extraction.get('raw_text', ''),
+                'visual_features': extraction.get('visual_features', ''),
+                'extraction_method': extraction.get('extraction_method', ''),
+                'labels': {},
+                'quality_score': 0.0,
+                'success': extraction.get('success', False),
+                'processing_time': (end_time - start_time).total_seconds(),
+                'timestamp': end_time.isoformat(),
+                'agentic_system': True,
+                'embedding_only': True
+            }
+            if not result['success']:
+                result['error'] = extraction.get('error', 'Content extraction failed')
+                return result
+            
+            # PII redaction still applies before anything is stored
+            result = self._apply_guardrails(result)
+            self._store_embedding(result, file_path)
+            
+            logger.info("EMBEDDING-ONLY PROCESSING COMPLETE", processing_time=result['processing_time'])
+            return result
+            
+        except Exception as e:
+            logger.exception("File processing error", file_path=file_path, error=str(e))
+            return {
+                'error': str(e),
+                'file_name': file_name,
+                'success': False
+            }
+    
+    def _apply_guardrails(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate a result with the guardrails, returning the sanitized result on violations."""
+        if not self.guardrails:
+            result['guardrail_passed'] = None
+            return result
+        
+        try:
+            is_valid, violations, sanitized_result = self.guardrails.validate_output(result)
+            
+            if not is_valid:
+                logger.warning("Guardrail violations detected",
+                             violations=violations,
+                             violation_count=len(violations))
+                result = sanitized_result
+                result['guardrail_passed'] = False
+            else:
+                result['guardrail_passed'] = True
+                logger.info("Guardrails validation passed")
+        except Exception as e:
+            logger.error("Guardrails validation error", error=str(e))
+            # Continue without guardrails if validation fails
+            result['guardrail_passed'] = None
+            result['guardrail_error'] = str(e)
+        return result
+    
+    def _store_embedding(self, result: Dict[str, Any], file_path: str) -> None:
+        """Store a result's embedding in the database; failures are logged, not raised."""
+        if not self.embedding_db:
+            return
+        
+        try:
+            # Generate unique file_id from file_path or use existing identifier
+            file_id = result.get('file_id') or os.path.splitext(
+                os.path.basename(file_path)
+            )[0] if file_path else str(uuid.uuid4())
+            
+            # Store embedding
+            embedding_stored = self.embedding_db.store_embedding(
+                file_id=file_id,
+                file_name=result.get('file_name', os.path.basename(file_path) if file_path else 'unknown'),
+                output_data=result,
+                file_path=file_path
+            )
+            
+            if embedding_stored:
+                logger.info("Output stored as embedding in database", file_id=file_id)
+            else:
+                logger.warning("Failed to store embedding in database", file_id=file_id)
+        except Exception as e:
+            logger.error("Error storing embedding", error=str(e))
+            # Don't fail the whole process if embedding storage fails
+    
     def _save_output(self, result: Dict[str, Any], output_dir: str):
         """Save processing output."""
         from agents.agents.json_output_agent import JSONOutputAgent
@@ -444,3 +543,27 @@ class AgenticOrchestrator:
                 for tool in self.tool_registry.get_all_tools()
             ]
         }
+
+
+@lru_cache(maxsize=None)
+def get_agentic_orchestrator(
+    deepseek_api_key: Optional[str] = None,
+    openai_api_key: Optional[str] = None
+) -> AgenticOrchestrator:
+    """
+    Get a shared orchestrator for the given API keys, built on first use.
+    
+    Lets scripts that run several checks in one process pay the agent,
+    tool and database warm-up once.
+    
+    Args:
+        deepseek_api_key: DeepSeek API key
+        openai_api_key: OpenAI API key
+        
+    Returns:
+        AgenticOrchestrator instance
+    """
+    return AgenticOrchestrator(
+        deepseek_api_key=deepseek_api_key,
+        openai_api_key=openai_api_key
+    )
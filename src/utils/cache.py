@@ -5,8 +5,9 @@ import os
 import sys
 import hashlib
 import json
+import time
 from pathlib import Path
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, Iterable, Optional, Tuple, Callable
 from datetime import datetime, timedelta
 from collections import OrderedDict
 from threading import Lock
@@ -17,24 +18,45 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 from utils.logger import get_system_logger
 from config import Config
 
+try:
+    import blake3  # SIMD-accelerated hashing, several times faster than sha256
+except ImportError:
+    blake3 = None
+
 logger = get_system_logger()
 
+# Read size for streaming file hashes: constant memory regardless of file size
+_HASH_CHUNK_SIZE = 65536
+
+# Content hash used for cache keys; named in the key so algorithms never collide
+_HASH_NAME = 'blake3' if blake3 is not None else 'sha256'
+
+# Maximum number of files whose (inode, size, mtime) -> hash mapping is remembered
+_STAT_INDEX_MAX = 4096
+
 
 class FileCache:
     """
     In-memory cache for processed file results with LRU eviction.
     """
     
-    def __init__(self, max_size: int = 100, ttl_seconds: int = 3600):
+    def __init__(
+        self,
+        max_size: int = 100,
+        ttl_seconds: int = 3600,
+        time_fn: Callable[[], float] = time.monotonic
+    ):
         """
         Initialize file cache.
         
         Args:
             max_size: Maximum number of cached items
             ttl_seconds: Time-to-live in seconds (default: 1 hour)
+            time_fn: Clock used for TTL checks, in seconds (default: time.monotonic)
         """
         self.max_size = max_size
         self.ttl_seconds = ttl_seconds
+        self.time_fn = time_fn
         self.cache: OrderedDict[str, Dict[str, Any]] = OrderedDict()
         self.lock = Lock()
         logger.info("File cache initialized", max_size=max_size, ttl_seconds=ttl_seconds)
@@ -44,8 +66,7 @@ class FileCache:
         if 'timestamp' not in cached_item:
             return True
         
-        cached_time = datetime.fromisoformat(cached_item['timestamp'])
-        age = (datetime.now() - cached_time).total_seconds()
+        age = self.time_fn() - cached_item['timestamp']
         return age > self.ttl_seconds
     
     def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
@@ -85,23 +106,38 @@ class FileCache:
             result: Processing result to cache
         """
         with self.lock:
-            # Remove if exists (to update position)
-            if cache_key in self.cache:
-                del self.cache[cache_key]
-            
-            # Evict oldest if at capacity
-            if len(self.cache) >= self.max_size:
-                oldest_key = next(iter(self.cache))
-                del self.cache[oldest_key]
-                logger.debug("Cache evicted oldest entry", key=oldest_key)
-            
-            # Store new entry
-            self.cache[cache_key] = {
-                'result': result,
-                'timestamp': datetime.now().isoformat()
-            }
-            
-            logger.debug("Cache entry stored", key=cache_key, cache_size=len(self.cache))
+            self._set_nolock(cache_key, result)
+    
+    def set_many(self, items: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+        """
+        Store several results, taking the lock once.
+        
+        Args:
+            items: (cache_key, result) pairs, stored in order
+        """
+        with self.lock:
+            for cache_key, result in items:
+                self._set_nolock(cache_key, result)
+    
+    def _set_nolock(self, cache_key: str, result: Dict[str, Any]) -> None:
+        """Store one entry with LRU eviction; caller must hold self.lock."""
+        # Remove if exists (to update position)
+        if cache_key in self.cache:
+            del self.cache[cache_key]
+        
+        # Evict oldest if at capacity
+        if len(self.cache) >= self.max_size:
+            oldest_key = next(iter(self.cache))
+            del self.cache[oldest_key]
+            logger.debug("Cache evicted oldest entry", key=oldest_key)
+        
+        # Store new entry
+        self.cache[cache_key] = {
+            'result': result,
+            'timestamp': self.time_fn()
+        }
+        
+        logger.debug("Cache entry stored", key=cache_key, cache_size=len(self.cache))
     
     def clear(self) -> None:
         """Clear all cached entries."""
@@ -152,41 +188,62 @@ class ResultCache:
         else:
             self.memory_cache = None
         
+        # path -> (inode, size, mtime_ns, content hash hex) so unchanged files skip rehashing
+        self._stat_index: Dict[str, Tuple[int, int, int, str]] = {}
+        
         logger.info("Result cache initialized",
                    memory_cache=enable_memory_cache,
                    db_cache=enable_db_cache)
     
     def _compute_file_hash(self, file_path: str) -> str:
         """
-        Compute SHA256 hash of file for cache key.
+        Compute content hash of file for cache key.
+        
+        Uses BLAKE3 when the blake3 package is installed, SHA256 otherwise.
         
         Args:
             file_path: Path to file
             
         Returns:
-            SHA256 hash as hex string
+            Hash as hex string
         """
-        sha256_hash = hashlib.sha256()
+        file_hash = self._new_hasher()
         
         try:
-            with open(file_path, "rb") as f:
-                # Read file in chunks to handle large files
-                for byte_block in iter(lambda: f.read(4096), b""):
-                    sha256_hash.update(byte_block)
+            # Unbuffered reads straight into the hash, in chunks to handle large files
+            with open(file_path, "rb", buffering=0) as f:
+                for byte_block in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+                    file_hash.update(byte_block)
             
-            return sha256_hash.hexdigest()
+            return file_hash.hexdigest()
         except Exception as e:
             logger.error("Failed to compute file hash", file_path=file_path, error=str(e))
             # Fallback to filename-based hash
-            return hashlib.sha256(os.path.basename(file_path).encode()).hexdigest()
+            fallback_hash = self._new_hasher()
+            fallback_hash.update(os.path.basename(file_path).encode())
+            return fallback_hash.hexdigest()
     
-    def _get_cache_key(self, file_path: str, file_id: Optional[str] = None) -> str:
+    @staticmethod
+    def _new_hasher():
+        """Return a new hash object for _HASH_NAME."""
+        return blake3.blake3() if blake3 is not None else hashlib.sha256()
+    
+    def _get_cache_key(
+        self,
+        file_path: str,
+        file_id: Optional[str] = None,
+        force_rehash: bool = False
+    ) -> str:
         """
         Get cache key for file.
         
+        The content hash is reused while the file's inode, size and mtime are
+        unchanged, so repeated lookups of the same file cost one stat call.
+        
         Args:
             file_path: Path to file
             file_id: Optional file ID (if available)
+            force_rehash: Always hash the file contents, ignoring the stat index
             
         Returns:
             Cache key string
@@ -194,14 +251,30 @@ class ResultCache:
         if file_id:
             return f"file_id:{file_id}"
         
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            # Let _compute_file_hash apply its fallback
+            return f"file_hash:{_HASH_NAME}:{self._compute_file_hash(file_path)}"
+        
+        signature = (st.st_ino, st.st_size, st.st_mtime_ns)
+        indexed = self._stat_index.get(file_path)
+        if indexed and not force_rehash and indexed[:3] == signature:
+            return f"file_hash:{_HASH_NAME}:{indexed[3]}"
+        
         # Use file hash as cache key
         file_hash = self._compute_file_hash(file_path)
-        return f"file_hash:{file_hash}"
+        if file_path not in self._stat_index and len(self._stat_index) >= _STAT_INDEX_MAX:
+            # Forget the oldest entry
+            self._stat_index.pop(next(iter(self._stat_index)), None)
+        self._stat_index[file_path] = (*signature, file_hash)
+        return f"file_hash:{_HASH_NAME}:{file_hash}"
     
     def get_cached_result(
         self,
         file_path: str,
-        file_id: Optional[str] = None
+        file_id: Optional[str] = None,
+        force_rehash: bool = False
     ) -> Optional[Dict[str, Any]]:
         """
         Get cached result for file.
@@ -211,11 +284,12 @@ class ResultCache:
         Args:
             file_path: Path to file
             file_id: Optional file ID
+            force_rehash: Hash the file contents even if its stat info is unchanged
             
         Returns:
             Cached result or None if not found
         """
-        cache_key = self._get_cache_key(file_path, file_id)
+        cache_key = self._get_cache_key(file_path, file_id, force_rehash=force_rehash)
         
         # Check in-memory cache first
         if self.enable_memory_cache and self.memory_cache:
@@ -238,6 +312,12 @@ class ResultCache:
                     # Try to find by file_name match (fallback)
                     db_result = None
                 
+                # Embedding-only records have no labels or quality score, so
+                # they can't stand in for a full processing result
+                if db_result and (db_result.get('metadata') or {}).get('embedding_only'):
+                    logger.debug("Ignoring embedding-only database record", file_id=file_id)
+                    db_result = None
+                
                 if db_result:
                     # Convert database record to result format
                     result = self._db_record_to_result(db_result)
@@ -321,6 +401,7 @@ class ResultCache:
         """Clear all caches."""
         if self.enable_memory_cache and self.memory_cache:
             self.memory_cache.clear()
+        self._stat_index.clear()
         logger.info("All caches cleared")
     
     def get_cache_stats(self) -> Dict[str, Any]:
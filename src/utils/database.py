@@ -4,12 +4,19 @@ Database module for storing embeddings in Supabase PostgreSQL with pgvector
 import os
 import sys
 import json
+import atexit
+import hashlib
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple, Final
 from datetime import datetime
 import psycopg2
-from psycopg2.extras import Json
-from psycopg2.pool import SimpleConnectionPool
+from psycopg2.extras import Json, RealDictCursor
+from psycopg2.pool import AbstractConnectionPool, ThreadedConnectionPool
+import numpy as np
+from pgvector.psycopg2 import register_vector
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
@@ -20,6 +27,128 @@ from utils.embedding_providers import create_embedding_provider, get_embedding_d
 
 logger = get_system_logger()
 
+# Connection pools shared by every EmbeddingDatabase in the process, keyed by
+# (connection string, pool size); kept open until interpreter exit
+_SHARED_POOLS: Dict[Tuple[str, int], ThreadedConnectionPool] = {}
+_SHARED_POOLS_LOCK = threading.Lock()
+
+
+def _close_shared_pools() -> None:
+    """Close all shared connection pools."""
+    with _SHARED_POOLS_LOCK:
+        for pool in _SHARED_POOLS.values():
+            pool.closeall()
+        _SHARED_POOLS.clear()
+
+
+atexit.register(_close_shared_pools)
+
+# Columns returned for a full record lookup. The embedding is fetched in
+# pgvector's binary halfvec format (see _decode_halfvec) rather than as text
+_RECORD_COLUMNS = """
+    id, file_id, file_name, file_path, modality, category,
+    raw_text, labels, metadata, halfvec_send(embedding) AS embedding, quality_score,
+    processing_time, created_at, updated_at
+"""
+
+# Largest hnsw.ef_search value pgvector accepts
+_HNSW_MAX_EF_SEARCH: Final[int] = 1000
+
+# Binary halfvec layout: int16 dimension, int16 unused, then big-endian fp16 values
+_HALFVEC_HEADER_SIZE: Final[int] = 4
+
+
+def _decode_halfvec(record: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Decode a record's binary halfvec embedding into a float32 array in place.
+    
+    The fp16 values are read straight from the buffer, avoiding the per-float
+    text parsing of the vector text format; the conversion is lossless.
+    """
+    if record is not None and record['embedding'] is not None:
+        record['embedding'] = np.frombuffer(
+            record['embedding'], dtype='>f2', offset=_HALFVEC_HEADER_SIZE
+        ).astype(np.float32)
+    return record
+
+
+# Upsert used by store_embedding for full results; parameters follow EmbeddingRow field order
+_INSERT_SQL: Final[str] = """
+    INSERT INTO data_labeling_embeddings (
+        file_id, file_name, file_path, modality, category,
+        raw_text, labels, metadata, embedding,
+        quality_score, processing_time, content_hash
+    ) VALUES (
+        %s, %s, %s, %s, %s,
+        substring(%s from 1 for 10000), %s, %s, %s::halfvec,
+        %s, %s, %s
+    )
+    ON CONFLICT (file_id) 
+    DO UPDATE SET
+        file_name = EXCLUDED.file_name,
+        file_path = EXCLUDED.file_path,
+        modality = EXCLUDED.modality,
+        category = EXCLUDED.category,
+        raw_text = EXCLUDED.raw_text,
+        labels = EXCLUDED.labels,
+        metadata = EXCLUDED.metadata,
+        embedding = EXCLUDED.embedding,
+        quality_score = EXCLUDED.quality_score,
+        processing_time = EXCLUDED.processing_time,
+        content_hash = EXCLUDED.content_hash,
+        updated_at = NOW()
+"""
+
+# Refresh of an unchanged record (same content hash, embedding present): only
+# the columns that don't feed the embedding are rewritten; no row if changed
+_REFRESH_UNCHANGED_SQL: Final[str] = """
+    UPDATE data_labeling_embeddings
+    SET file_name = %s, file_path = %s, metadata = %s, processing_time = %s, updated_at = NOW()
+    WHERE file_id = %s AND content_hash = %s AND embedding IS NOT NULL
+"""
+
+# Embedding-only results leave an existing record's metadata alone
+_REFRESH_UNCHANGED_EMBEDDING_ONLY_SQL: Final[str] = """
+    UPDATE data_labeling_embeddings
+    SET updated_at = NOW()
+    WHERE file_id = %s AND content_hash = %s AND embedding IS NOT NULL
+"""
+
+# Upsert for embedding-only results (no labels, category or quality score): an
+# existing record keeps its labels and metadata, only its embedding is refreshed
+_INSERT_EMBEDDING_ONLY_SQL: Final[str] = _INSERT_SQL[:_INSERT_SQL.index('DO UPDATE SET')] + """DO UPDATE SET
+        raw_text = EXCLUDED.raw_text,
+        embedding = EXCLUDED.embedding,
+        content_hash = EXCLUDED.content_hash,
+        updated_at = NOW()
+"""
+
+
+@dataclass
+class EmbeddingRow:
+    """Parameters for one data_labeling_embeddings upsert."""
+    file_id: str
+    file_name: str
+    file_path: Optional[str]
+    modality: Optional[str]
+    category: Optional[str]
+    raw_text: str
+    labels: Json
+    metadata: Json
+    embedding: Optional[np.ndarray]
+    quality_score: Optional[float]
+    processing_time: Optional[float]
+    content_hash: Optional[bytes]
+    
+    def as_params(self) -> Tuple:
+        """Return the row as a positional parameter tuple for _INSERT_SQL."""
+        # Built by hand: dataclasses.astuple() would deep-copy the embedding
+        return (
+            self.file_id, self.file_name, self.file_path, self.modality, self.category,
+            self.raw_text, self.labels, self.metadata, self.embedding,
+            self.quality_score, self.processing_time, self.content_hash
+        )
+
 
 class EmbeddingDatabase:
     """
@@ -31,7 +160,8 @@ class EmbeddingDatabase:
         connection_string: Optional[str] = None,
         openai_api_key: Optional[str] = None,
         pool_size: int = 5,
-        embedding_provider_type: Optional[str] = None
+        embedding_provider_type: Optional[str] = None,
+        pool: Optional[AbstractConnectionPool] = None
     ):
         """
         Initialize the embedding database.
@@ -41,6 +171,8 @@ class EmbeddingDatabase:
             openai_api_key: OpenAI API key for generating embeddings (optional)
             pool_size: Connection pool size
             embedding_provider_type: Type of embedding provider ('auto', 'huggingface', 'openai')
+            pool: Existing connection pool to use instead of the process-wide
+                  shared pool for connection_string; it is left open by close()
         """
         self.connection_string = connection_string or os.getenv(
             'SUPABASE_DB_URL',
@@ -49,6 +181,9 @@ class EmbeddingDatabase:
         
         self.pool_size = pool_size
         
+        # Dimension of the embedding column; shorter provider vectors are zero-padded
+        self._target_dim = 1536
+        
         # Determine embedding provider type
         provider_type = embedding_provider_type or Config.EMBEDDING_PROVIDER
         
@@ -84,29 +219,64 @@ class EmbeddingDatabase:
             self.embedding_dimension = 384  # Default
             logger.warning("No embedding provider available. Embedding generation will not work.")
         
-        # Initialize connection pool
+        # Use the caller's pool, or the shared pool for this connection string
         try:
-            self.pool = SimpleConnectionPool(
-                1, pool_size, self.connection_string
-            )
-            logger.info("Database connection pool created", pool_size=pool_size)
+            if pool is not None:
+                self.pool = pool
+                self._register_vector()
+            else:
+                self.pool = self._get_shared_pool(self.connection_string, pool_size)
         except Exception as e:
             logger.error("Failed to create database connection pool", error=str(e))
             self.pool = None
             raise
     
-    def _get_connection(self):
-        """Get a connection from the pool."""
+    def _register_vector(self) -> None:
+        """Let psycopg2 send and receive pgvector columns as numpy arrays."""
+        with self._connection() as conn:
+            register_vector(conn, globally=True)
+    
+    def _get_shared_pool(self, connection_string: str, pool_size: int) -> ThreadedConnectionPool:
+        """
+        Get the process-wide pool for a connection string, creating it on first use.
+        
+        Later instances reuse its already-open connections instead of paying for
+        a new TLS handshake and pgvector type lookup.
+        """
+        key = (connection_string, pool_size)
+        with _SHARED_POOLS_LOCK:
+            pool = _SHARED_POOLS.get(key)
+            if pool is None:
+                self.pool = ThreadedConnectionPool(1, pool_size, connection_string)
+                try:
+                    self._register_vector()
+                except Exception:
+                    self.pool.closeall()
+                    raise
+                pool = _SHARED_POOLS[key] = self.pool
+                logger.info("Database connection pool created", pool_size=pool_size)
+        return pool
+    
+    @contextmanager
+    def _connection(self):
+        """
+        Borrow a connection from the pool for the duration of a block.
+        
+        The transaction is committed when the block exits normally and rolled
+        back on any exception (including KeyboardInterrupt and generator
+        close). The connection always goes back to the pool; if it was broken
+        while borrowed it is discarded so the pool can open a fresh one.
+        """
         if not self.pool:
             raise ConnectionError("Database connection pool not initialized")
-        return self.pool.getconn()
-    
-    def _return_connection(self, conn):
-        """Return a connection to the pool."""
-        if self.pool:
-            self.pool.putconn(conn)
+        conn = self.pool.getconn()
+        try:
+            with conn:
+                yield conn
+        finally:
+            self.pool.putconn(conn, close=bool(conn.closed))
     
-    def generate_embedding(self, text: str) -> Optional[List[float]]:
+    def generate_embedding(self, text: str) -> Optional[np.ndarray]:
         """
         Generate embedding for text using the configured provider.
         
@@ -114,24 +284,35 @@ class EmbeddingDatabase:
             text: Text to generate embedding for
             
         Returns:
-            Embedding vector or None if generation fails
+            float32 embedding vector or None if generation fails
+        """
+        return self.generate_embeddings([text])[0]
+    
+    def generate_embeddings(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        Generate embeddings for several texts in one provider call.
+        
+        Args:
+            texts: Texts to generate embeddings for
+            
+        Returns:
+            One float32 embedding vector (or None if generation fails) per text
         """
         if not self.embedding_provider:
             logger.warning("Embedding provider not available, cannot generate embedding")
-            return None
+            return [None] * len(texts)
         
         try:
-            embedding = self.embedding_provider.generate_embedding(text)
-            if embedding:
-                logger.debug("Embedding generated", 
-                           text_length=len(text), 
-                           embedding_dim=len(embedding),
-                           dimension=self.embedding_dimension)
-            return embedding
+            embeddings = self.embedding_provider.generate_embeddings(texts)
+            logger.debug("Embeddings generated", 
+                       count=len(texts),
+                       generated=sum(e is not None for e in embeddings),
+                       dimension=self.embedding_dimension)
+            return embeddings
             
         except Exception as e:
             logger.error("Failed to generate embedding", error=str(e))
-            return None
+            return [None] * len(texts)
     
     def store_embedding(
         self,
@@ -146,7 +327,9 @@ class EmbeddingDatabase:
         Args:
             file_id: Unique identifier for the file
             file_name: Name of the file
-            output_data: The complete output JSON data
+            output_data: The complete output JSON data; embedding-only results
+                         (output_data['embedding_only']) never overwrite an
+                         existing record's labels, category, quality or metadata
             file_path: Path to the original file (optional)
             
         Returns:
@@ -156,8 +339,15 @@ class EmbeddingDatabase:
             logger.error("Database connection pool not available")
             return False
         
-        conn = None
         try:
+            # Skip re-encoding when this file's content is already stored;
+            # the record's metadata is still refreshed
+            content_hash = self._compute_content_hash(file_name, file_path, output_data)
+            metadata = Json(self._record_metadata(output_data))
+            if self._refresh_if_unchanged(file_id, content_hash, file_name, file_path, metadata, output_data):
+                logger.info("Embedding unchanged, refreshed metadata only", file_id=file_id)
+                return True
+            
             # Prepare text for embedding
             # Combine relevant fields to create a meaningful text representation
             text_parts = []
@@ -191,99 +381,146 @@ class EmbeddingDatabase:
             # Generate embedding
             embedding = self.generate_embedding(embedding_text)
             
-            if not embedding:
+            if embedding is None:
                 logger.warning("Failed to generate embedding, storing without embedding", file_id=file_id)
             else:
                 # Handle dimension mismatch: pad or truncate to match database schema
-                # Database table uses 1536 (OpenAI), but HuggingFace uses 384
-                target_dim = 1536  # Database schema dimension
-                if len(embedding) != target_dim:
-                    if len(embedding) < target_dim:
-                        # Pad with zeros if smaller (e.g., HuggingFace 384 -> 1536)
-                        # Note: Padding with zeros is not ideal for similarity search
-                        # but allows storing different dimension embeddings in same table
-                        padding = [0.0] * (target_dim - len(embedding))
-                        embedding = embedding + padding
-                        logger.debug("Padded embedding", 
-                                   original_dim=len(embedding) - len(padding), 
-                                   padded_dim=len(embedding),
-                                   provider_dim=self.embedding_dimension)
-                    else:
-                        # Truncate if larger (shouldn't happen, but handle it)
-                        embedding = embedding[:target_dim]
-                        logger.debug("Truncated embedding", 
-                                   original_dim=len(embedding), 
-                                   truncated_dim=target_dim)
-            
-            # Get connection from pool
-            conn = self._get_connection()
-            cursor = conn.cursor()
+                # Database table uses halfvec(1536) (OpenAI), but HuggingFace uses 384
+                target_dim = self._target_dim
+                original_dim = embedding.shape[0]
+                if original_dim < target_dim:
+                    # Pad with zeros if smaller (e.g., HuggingFace 384 -> 1536)
+                    # Note: Padding with zeros is not ideal for similarity search
+                    # but allows storing different dimension embeddings in same table
+                    padded = np.zeros(target_dim, dtype=np.float32)
+                    padded[:original_dim] = embedding
+                    embedding = padded
+                    logger.debug("Padded embedding", 
+                               original_dim=original_dim, 
+                               padded_dim=target_dim,
+                               provider_dim=self.embedding_dimension)
+                elif original_dim > target_dim:
+                    # Truncate if larger (shouldn't happen, but handle it)
+                    embedding = embedding[:target_dim]
+                    logger.debug("Truncated embedding", 
+                               original_dim=original_dim, 
+                               truncated_dim=target_dim)
             
             # Prepare data for insertion
-            insert_data = {
-                'file_id': file_id,
-                'file_name': file_name,
-                'file_path': file_path,
-                'modality': output_data.get('modality'),
-                'category': output_data.get('category'),
-                'raw_text': output_data.get('raw_text', '')[:10000],  # Limit text length
-                'labels': Json(output_data.get('labels', {})),
-                'metadata': Json({
-                    'quality_score': output_data.get('quality_score'),
-                    'quality_status': output_data.get('quality_status'),
-                    'processing_time': output_data.get('processing_time'),
-                    'timestamp': output_data.get('timestamp'),
-                    'agentic_system': output_data.get('agentic_system', False),
-                    'agents_involved': output_data.get('agents_involved', []),
-                    'extraction_method': output_data.get('extraction_method'),
-                    'confidence': output_data.get('confidence'),
-                }),
-                'embedding': embedding,
-                'quality_score': output_data.get('quality_score'),
-                'processing_time': output_data.get('processing_time')
-            }
+            row = EmbeddingRow(
+                file_id=file_id,
+                file_name=file_name,
+                file_path=file_path,
+                modality=output_data.get('modality'),
+                category=output_data.get('category'),
+                raw_text=output_data.get('raw_text', ''),  # Truncated to 10000 chars by the INSERT
+                labels=Json(output_data.get('labels', {})),
+                metadata=metadata,
+                embedding=embedding,
+                quality_score=output_data.get('quality_score'),
+                processing_time=output_data.get('processing_time'),
+                # No hash without an embedding, so a later store backfills it
+                content_hash=content_hash if embedding is not None else None
+            )
             
             # Insert or update record
-            query = """
-                INSERT INTO data_labeling_embeddings (
-                    file_id, file_name, file_path, modality, category,
-                    raw_text, labels, metadata, embedding,
-                    quality_score, processing_time
-                ) VALUES (
-                    %(file_id)s, %(file_name)s, %(file_path)s, %(modality)s, %(category)s,
-                    %(raw_text)s, %(labels)s, %(metadata)s, %(embedding)s::vector,
-                    %(quality_score)s, %(processing_time)s
-                )
-                ON CONFLICT (file_id) 
-                DO UPDATE SET
-                    file_name = EXCLUDED.file_name,
-                    file_path = EXCLUDED.file_path,
-                    modality = EXCLUDED.modality,
-                    category = EXCLUDED.category,
-                    raw_text = EXCLUDED.raw_text,
-                    labels = EXCLUDED.labels,
-                    metadata = EXCLUDED.metadata,
-                    embedding = EXCLUDED.embedding,
-                    quality_score = EXCLUDED.quality_score,
-                    processing_time = EXCLUDED.processing_time,
-                    updated_at = NOW()
-            """
-            
-            cursor.execute(query, insert_data)
-            conn.commit()
+            insert_sql = _INSERT_EMBEDDING_ONLY_SQL if output_data.get('embedding_only') else _INSERT_SQL
+            with self._connection() as conn, conn.cursor() as cursor:
+                cursor.execute(insert_sql, row.as_params())
             
             logger.info("Embedding stored successfully", file_id=file_id, file_name=file_name)
             return True
             
         except Exception as e:
-            if conn:
-                conn.rollback()
             logger.error("Failed to store embedding", file_id=file_id, error=str(e))
             return False
-        finally:
-            if conn:
-                cursor.close()
-                self._return_connection(conn)
+    
+    def _embedding_model_id(self) -> Optional[str]:
+        """Identify the embedding provider and model, e.g. 'OpenAIEmbeddingProvider:text-embedding-3-small'."""
+        provider = self.embedding_provider
+        if provider is None:
+            return None
+        model = getattr(provider, 'model_name', None) or getattr(provider, 'MODEL', None)
+        return f"{type(provider).__name__}:{model}"
+    
+    def _compute_content_hash(
+        self,
+        file_name: str,
+        file_path: Optional[str],
+        output_data: Dict[str, Any]
+    ) -> bytes:
+        """
+        Compute a stable digest of the fields that determine the stored embedding.
+        
+        The embedding provider and model are included, so switching either
+        re-encodes existing records.
+        
+        Returns:
+            32-byte BLAKE2b digest
+        """
+        payload = json.dumps(
+            {
+                'embedding_model': self._embedding_model_id(),
+                'file_name': file_name,
+                'file_path': file_path,
+                'raw_text': output_data.get('raw_text'),
+                'labels': output_data.get('labels'),
+                'category': output_data.get('category'),
+                'modality': output_data.get('modality'),
+                'quality_score': output_data.get('quality_score'),
+            },
+            sort_keys=True,
+            separators=(',', ':'),
+            default=str
+        )
+        return hashlib.blake2b(payload.encode('utf-8'), digest_size=32).digest()
+    
+    @staticmethod
+    def _record_metadata(output_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the metadata column for a processing result."""
+        return {
+            'quality_score': output_data.get('quality_score'),
+            'quality_status': output_data.get('quality_status'),
+            'processing_time': output_data.get('processing_time'),
+            'timestamp': output_data.get('timestamp'),
+            'agentic_system': output_data.get('agentic_system', False),
+            'agents_involved': output_data.get('agents_involved', []),
+            'extraction_method': output_data.get('extraction_method'),
+            'confidence': output_data.get('confidence'),
+            'embedding_only': output_data.get('embedding_only', False),
+        }
+    
+    def _refresh_if_unchanged(
+        self,
+        file_id: str,
+        content_hash: bytes,
+        file_name: str,
+        file_path: Optional[str],
+        metadata: Json,
+        output_data: Dict[str, Any]
+    ) -> bool:
+        """
+        Refresh a stored record whose content hash matches and that has an embedding.
+        
+        Checking and updating happen in one statement, so an unchanged result
+        costs a single round trip and no re-encoding.
+        
+        Returns:
+            True if such a record existed and was refreshed
+        """
+        try:
+            with self._connection() as conn, conn.cursor() as cursor:
+                if output_data.get('embedding_only'):
+                    cursor.execute(_REFRESH_UNCHANGED_EMBEDDING_ONLY_SQL, (file_id, content_hash))
+                else:
+                    cursor.execute(_REFRESH_UNCHANGED_SQL, (
+                        file_name, file_path, metadata, output_data.get('processing_time'),
+                        file_id, content_hash
+                    ))
+                return cursor.rowcount > 0
+        except Exception as e:
+            logger.warning("Content hash lookup failed", file_id=file_id, error=str(e))
+            return False
     
     def search_similar(
         self,
@@ -312,30 +549,24 @@ class EmbeddingDatabase:
         
         # Generate embedding for query
         query_embedding = self.generate_embedding(query_text)
-        if not query_embedding:
+        if query_embedding is None:
             logger.error("Failed to generate query embedding")
             return []
         
-        conn = None
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            # Build query with filters
-            where_clauses = []
-            params = {'query_embedding': query_embedding, 'threshold': threshold, 'limit': limit}
-            
-            if modality:
-                where_clauses.append("modality = %(modality)s")
-                params['modality'] = modality
-            
-            if category:
-                where_clauses.append("category = %(category)s")
-                params['category'] = category
-            
-            where_sql = " AND " + " AND ".join(where_clauses) if where_clauses else ""
+            # Over-fetch in index order and apply the similarity threshold here;
+            # a threshold predicate in SQL can't be used to prune the HNSW scan
+            candidates = limit * 3
+            
+            # Filters are always bound (None when unused) so the query text never changes
+            params = {
+                'query_embedding': query_embedding,
+                'candidates': candidates,
+                'modality': modality or None,
+                'category': category or None
+            }
             
-            query = f"""
+            query = """
                 SELECT 
                     id,
                     file_id,
@@ -349,30 +580,27 @@ class EmbeddingDatabase:
                     quality_score,
                     processing_time,
                     created_at,
-                    1 - (embedding <=> %(query_embedding)s::vector) as similarity
+                    1 - (embedding <=> %(query_embedding)s::halfvec) as similarity
                 FROM data_labeling_embeddings
                 WHERE embedding IS NOT NULL
-                    AND (1 - (embedding <=> %(query_embedding)s::vector)) >= %(threshold)s
-                    {where_sql}
-                ORDER BY embedding <=> %(query_embedding)s::vector
-                LIMIT %(limit)s
+                    AND (%(modality)s::text IS NULL OR modality = %(modality)s)
+                    AND (%(category)s::text IS NULL OR category = %(category)s)
+                ORDER BY embedding <=> %(query_embedding)s::halfvec
+                LIMIT %(candidates)s
             """
             
-            cursor.execute(query, params)
-            results = cursor.fetchall()
-            
-            # Convert results to dictionaries
-            columns = [desc[0] for desc in cursor.description]
-            similar_records = []
+            # Rows come back as dicts; JSONB columns are already decoded by psycopg2
+            with self._connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                # The HNSW candidate list should be at least as long as the rows we
+                # ask for, within pgvector's allowed range for ef_search
+                cursor.execute(
+                    "SELECT set_config('hnsw.ef_search', %s, true)",
+                    (str(min(max(candidates, 40), _HNSW_MAX_EF_SEARCH)),)
+                )
+                cursor.execute(query, params)
+                rows = cursor.fetchall()
             
-            for row in results:
-                record = dict(zip(columns, row))
-                # Convert JSONB fields back to dicts
-                if record.get('labels'):
-                    record['labels'] = dict(record['labels'])
-                if record.get('metadata'):
-                    record['metadata'] = dict(record['metadata'])
-                similar_records.append(record)
+            similar_records = [r for r in rows if r['similarity'] >= threshold][:limit]
             
             logger.info("Similarity search completed", 
                        query_length=len(query_text),
@@ -383,10 +611,6 @@ class EmbeddingDatabase:
         except Exception as e:
             logger.error("Failed to search similar embeddings", error=str(e))
             return []
-        finally:
-            if conn:
-                cursor.close()
-                self._return_connection(conn)
     
     def get_by_file_id(self, file_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -402,42 +626,105 @@ class EmbeddingDatabase:
             logger.error("Database connection pool not available")
             return None
         
-        conn = None
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
+            query = f"SELECT {_RECORD_COLUMNS} FROM data_labeling_embeddings WHERE file_id = %s"
+            
+            with self._connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                cursor.execute(query, (file_id,))
+                return _decode_halfvec(cursor.fetchone())
             
+        except Exception as e:
+            logger.error("Failed to get record by file_id", file_id=file_id, error=str(e))
+            return None
+    
+    def get_preview_by_file_id(self, file_id: str, n: int = 5) -> Optional[Dict[str, Any]]:
+        """
+        Get the dimension count and first n embedding values for a file_id.
+        
+        Args:
+            file_id: Unique file identifier
+            n: Number of leading embedding values to return
+            
+        Returns:
+            Preview dictionary (see get_previews_by_file_ids) or None if not found
+        """
+        return self.get_previews_by_file_ids([file_id], n).get(file_id)
+    
+    def get_previews_by_file_ids(self, file_ids: List[str], n: int = 5) -> Dict[str, Dict[str, Any]]:
+        """
+        Get dimension counts and first n embedding values for several file_ids in one query.
+        
+        The vectors are sliced in the database, so only n values per record are
+        sent instead of the full embeddings.
+        
+        Args:
+            file_ids: Unique file identifiers
+            n: Number of leading embedding values to return
+            
+        Returns:
+            Dictionary mapping file_id to {'embedding_dimensions', 'embedding_preview'}
+            (preview is a float32 array, None when the embedding is NULL);
+            missing ids are omitted
+        """
+        if not self.pool:
+            logger.error("Database connection pool not available")
+            return {}
+        
+        if not file_ids:
+            return {}
+        
+        try:
             query = """
                 SELECT 
-                    id, file_id, file_name, file_path, modality, category,
-                    raw_text, labels, metadata, embedding, quality_score,
-                    processing_time, created_at, updated_at
+                    file_id,
+                    vector_dims(embedding) AS embedding_dimensions,
+                    subvector(embedding, 1, %s)::real[] AS embedding_preview
                 FROM data_labeling_embeddings
-                WHERE file_id = %s
+                WHERE file_id = ANY(%s)
             """
             
-            cursor.execute(query, (file_id,))
-            result = cursor.fetchone()
+            with self._connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                cursor.execute(query, (n, list(file_ids)))
+                records = cursor.fetchall()
             
-            if result:
-                columns = [desc[0] for desc in cursor.description]
-                record = dict(zip(columns, result))
-                # Convert JSONB fields
-                if record.get('labels'):
-                    record['labels'] = dict(record['labels'])
-                if record.get('metadata'):
-                    record['metadata'] = dict(record['metadata'])
-                return record
+            previews = {}
+            for record in records:
+                if record['embedding_preview'] is not None:
+                    record['embedding_preview'] = np.asarray(record['embedding_preview'], dtype=np.float32)
+                previews[record['file_id']] = record
+            return previews
             
-            return None
+        except Exception as e:
+            logger.error("Failed to get embedding previews by file_ids", count=len(file_ids), error=str(e))
+            return {}
+    
+    def get_by_file_ids(self, file_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get embedding records for several file_ids in a single query.
+        
+        Args:
+            file_ids: Unique file identifiers
+            
+        Returns:
+            Dictionary mapping file_id to record (missing ids are omitted)
+        """
+        if not self.pool:
+            logger.error("Database connection pool not available")
+            return {}
+        
+        if not file_ids:
+            return {}
+        
+        try:
+            query = f"SELECT {_RECORD_COLUMNS} FROM data_labeling_embeddings WHERE file_id = ANY(%s)"
+            
+            with self._connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                cursor.execute(query, (list(file_ids),))
+                return {record['file_id']: _decode_halfvec(record) for record in cursor.fetchall()}
             
         except Exception as e:
-            logger.error("Failed to get record by file_id", file_id=file_id, error=str(e))
-            return None
-        finally:
-            if conn:
-                cursor.close()
-                self._return_connection(conn)
+            logger.error("Failed to get records by file_ids", count=len(file_ids), error=str(e))
+            return {}
     
     def get_statistics(self) -> Dict[str, Any]:
         """
@@ -449,11 +736,7 @@ class EmbeddingDatabase:
         if not self.pool:
             return {'error': 'Database connection pool not available'}
         
-        conn = None
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
             query = """
                 SELECT 
                     COUNT(*) as total_records,
@@ -464,11 +747,9 @@ class EmbeddingDatabase:
                 FROM data_labeling_embeddings
             """
             
-            cursor.execute(query)
-            result = cursor.fetchone()
-            
-            columns = [desc[0] for desc in cursor.description]
-            stats = dict(zip(columns, result))
+            with self._connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                cursor.execute(query)
+                stats = cursor.fetchone()
             
             # Ensure all numeric fields are properly handled
             for key in ['total_records', 'records_with_embeddings', 'unique_modalities', 'unique_categories']:
@@ -480,14 +761,13 @@ class EmbeddingDatabase:
         except Exception as e:
             logger.error("Failed to get statistics", error=str(e))
             return {'error': str(e)}
-        finally:
-            if conn:
-                cursor.close()
-                self._return_connection(conn)
     
     def close(self):
-        """Close the connection pool."""
-        if self.pool:
-            self.pool.closeall()
-            logger.info("Database connection pool closed")
+        """
+        Release this instance's connection pool.
+        
+        The pool itself stays open: it is either the caller's or shared with
+        other instances, and shared pools are closed at interpreter exit.
+        """
+        self.pool = None
 
@@ -2,16 +2,157 @@
 Embedding providers - Support for multiple embedding generation methods
 """
 import os
-from typing import Optional, List
+import threading
+from functools import lru_cache
+from typing import Optional, Dict, List, Tuple
+import numpy as np
 from utils.logger import get_system_logger
+from config import Config
 
 logger = get_system_logger()
 
+# Providers are shared per process so model weights are loaded only once
+_PROVIDER_CACHE: Dict[Tuple, "EmbeddingProvider"] = {}
+_PROVIDER_CACHE_LOCK = threading.Lock()
+
+# lru_cache does not stop concurrent callers from each loading the same model
+_MODEL_LOAD_LOCK = threading.Lock()
+
+
+# Supported values of Config.EMBEDDING_DTYPE
+EMBEDDING_DTYPES = ('fp32', 'bf16', 'int8')
+
+# Weight files a Sentence Transformer checkpoint may load from
+_WEIGHT_FILES = ('model.safetensors', 'pytorch_model.bin', 'onnx/model.onnx')
+
+
+@lru_cache(maxsize=4)
+def _load_sentence_transformer(model_name: str, compile_model: bool = False, dtype: str = 'fp32'):
+    """
+    Load a Sentence Transformer model (with its tokenizer) once per process.
+    
+    Every HuggingFaceEmbeddingProvider for the same model shares the loaded
+    weights, whether it was built directly or through create_embedding_provider.
+    Failed loads raise and are not cached.
+    
+    Args:
+        model_name: Name of the Sentence Transformer model
+        compile_model: Wrap the underlying transformer with torch.compile
+        dtype: Weight precision, one of EMBEDDING_DTYPES
+    """
+    from sentence_transformers import SentenceTransformer
+    _prefetch_weights(model_name)
+    model = SentenceTransformer(model_name)
+    _ensure_fast_tokenizer(model, model_name)
+    # bf16 keeps fp32 weights and runs under autocast at encode time
+    if dtype not in ('fp32', 'bf16'):
+        model = _convert_dtype(model, dtype)
+    if compile_model:
+        _compile_encoder(model)
+    return model
+
+
+def _prefetch_weights(model_name: str) -> None:
+    """
+    Ask the kernel to read already-downloaded weight files into the page cache.
+    
+    Safetensors weights are memory-mapped and faulted in piecemeal; a
+    WILLNEED hint turns that cold start into one sequential readahead.
+    Missing files, non-POSIX platforms and uncached models are skipped.
+    """
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    
+    if os.path.isdir(model_name):
+        paths = [os.path.join(model_name, filename) for filename in _WEIGHT_FILES]
+    else:
+        try:
+            from huggingface_hub import try_to_load_from_cache
+        except ImportError:
+            return
+        # SentenceTransformer resolves bare names under the sentence-transformers org
+        repo_id = model_name if '/' in model_name else f"sentence-transformers/{model_name}"
+        paths = [try_to_load_from_cache(repo_id, filename) for filename in _WEIGHT_FILES]
+    
+    for path in paths:
+        if not isinstance(path, str) or not os.path.isfile(path):
+            continue
+        try:
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            finally:
+                os.close(fd)
+            logger.debug("Prefetching model weights", path=path)
+        except OSError as e:
+            logger.debug("Could not prefetch model weights", path=path, error=str(e))
+
+
+def _ensure_fast_tokenizer(model, model_name: str) -> None:
+    """Swap a slow Python tokenizer for the Rust-backed fast one when available."""
+    tokenizer = getattr(model, 'tokenizer', None)
+    if tokenizer is None or getattr(tokenizer, 'is_fast', True):
+        return
+    
+    try:
+        from transformers import AutoTokenizer
+        fast_tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+    except Exception as e:
+        logger.warning("Fast tokenizer unavailable, using slow tokenizer", model=model_name, error=str(e))
+        return
+    
+    if fast_tokenizer.is_fast:
+        model.tokenizer = fast_tokenizer
+        logger.info("Switched to fast tokenizer", model=model_name)
+    else:
+        logger.warning("No fast tokenizer for model, using slow tokenizer", model=model_name)
+
+
+def _convert_dtype(model, dtype: str):
+    """
+    Dynamically quantize the model's Linear layers to int8.
+    
+    Falls back to the unchanged fp32 model when the conversion is not possible.
+    """
+    try:
+        import torch
+        if dtype == 'int8':
+            # Dynamic quantization kernels are CPU-only
+            if model.device.type != 'cpu':
+                logger.warning("int8 embedding model requires CPU, using fp32", device=str(model.device))
+                return model
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        else:
+            logger.warning("Unknown embedding dtype, using fp32", dtype=dtype)
+            return model
+        logger.info("Sentence Transformer weights converted", dtype=dtype)
+    except Exception as e:
+        logger.warning("Embedding dtype conversion failed, using fp32", dtype=dtype, error=str(e))
+    return model
+
+
+def _compile_encoder(model) -> None:
+    """
+    Compile the model's transformer module in place with torch.compile.
+    
+    Compilation happens lazily on the first forward pass. Dynamic shapes keep
+    varying batch sizes and sequence lengths from triggering recompiles.
+    """
+    try:
+        import torch
+        transformer = model[0]
+        # CUDA graphs cut per-kernel launch overhead; on CPU plain Inductor fusion
+        mode = 'reduce-overhead' if model.device.type == 'cuda' else 'default'
+        transformer.auto_model = torch.compile(transformer.auto_model, mode=mode, dynamic=True)
+        logger.info("Sentence Transformer encoder compiled", mode=mode)
+    except Exception as e:
+        logger.warning("torch.compile unavailable, using eager model", error=str(e))
+
 
 class EmbeddingProvider:
     """Base class for embedding providers."""
     
-    def generate_embedding(self, text: str) -> Optional[List[float]]:
+    def generate_embedding(self, text: str) -> Optional[np.ndarray]:
         """
         Generate embedding for text.
         
@@ -19,14 +160,32 @@ class EmbeddingProvider:
             text: Text to generate embedding for
             
         Returns:
-            Embedding vector or None if generation fails
+            float32 embedding vector or None if generation fails
         """
         raise NotImplementedError
+    
+    def generate_embeddings(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        Generate embeddings for several texts.
+        
+        Providers that support batching override this to embed all texts
+        in a single call.
+        
+        Args:
+            texts: Texts to generate embeddings for
+            
+        Returns:
+            One float32 embedding vector (or None) per input text, in order
+        """
+        return [self.generate_embedding(text) for text in texts]
 
 
 class OpenAIEmbeddingProvider(EmbeddingProvider):
     """OpenAI embedding provider."""
     
+    MODEL = "text-embedding-3-small"
+    MAX_TOKENS = 8191
+    
     def __init__(self, api_key: Optional[str] = None):
         """
         Initialize OpenAI embedding provider.
@@ -40,38 +199,71 @@ class OpenAIEmbeddingProvider(EmbeddingProvider):
         except ImportError:
             self.client = None
             logger.warning("OpenAI package not installed")
+        
+        # Token-accurate truncation when tiktoken is available
+        try:
+            import tiktoken
+            self.encoding = tiktoken.encoding_for_model(self.MODEL)
+        except Exception:
+            self.encoding = None
+            logger.debug("tiktoken not available, falling back to character truncation")
+    
+    def _truncate(self, text: str) -> str:
+        """Truncate text if it exceeds the model's token limit."""
+        if self.encoding is not None:
+            tokens = self.encoding.encode(text)
+            if len(tokens) > self.MAX_TOKENS:
+                text = self.encoding.decode(tokens[:self.MAX_TOKENS])
+                logger.debug("Text truncated for embedding", original_tokens=len(tokens))
+        else:
+            max_length = 8000
+            if len(text) > max_length:
+                logger.debug("Text truncated for embedding", original_length=len(text))
+                text = text[:max_length]
+        return text
     
-    def generate_embedding(self, text: str) -> Optional[List[float]]:
+    def generate_embedding(self, text: str) -> Optional[np.ndarray]:
         """Generate embedding using OpenAI."""
+        return self.generate_embeddings([text])[0]
+    
+    def generate_embeddings(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Generate embeddings for all texts in one OpenAI request."""
         if not self.client:
             logger.warning("OpenAI client not available")
-            return None
+            return [None] * len(texts)
+        
+        if not texts:
+            return []
         
         try:
-            # Truncate text if too long
-            max_length = 8000
-            if len(text) > max_length:
-                text = text[:max_length]
-                logger.debug("Text truncated for embedding", original_length=len(text))
-            
             response = self.client.embeddings.create(
-                model="text-embedding-ada-002",
-                input=text
+                model=self.MODEL,
+                input=[self._truncate(text) for text in texts]
             )
             
-            embedding = response.data[0].embedding
-            logger.debug("OpenAI embedding generated", dim=len(embedding))
-            return embedding
+            # Results carry their input index; don't rely on response order
+            embeddings: List[Optional[np.ndarray]] = [None] * len(texts)
+            for item in response.data:
+                embeddings[item.index] = np.asarray(item.embedding, dtype=np.float32)
+            logger.debug("OpenAI embeddings generated",
+                        count=len(texts),
+                        dim=embeddings[0].shape[0] if embeddings[0] is not None else None)
+            return embeddings
             
         except Exception as e:
             logger.error("OpenAI embedding generation failed", error=str(e))
-            return None
+            return [None] * len(texts)
 
 
 class HuggingFaceEmbeddingProvider(EmbeddingProvider):
     """Hugging Face Sentence Transformers provider (free, local)."""
     
-    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        compile_model: Optional[bool] = None,
+        dtype: Optional[str] = None
+    ):
         """
         Initialize Hugging Face embedding provider.
         
@@ -81,17 +273,25 @@ class HuggingFaceEmbeddingProvider(EmbeddingProvider):
                        Alternatives:
                        - all-mpnet-base-v2 (768 dim, better quality, slower)
                        - all-MiniLM-L12-v2 (384 dim, better than L6)
+            compile_model: Compile the encoder with torch.compile
+                          (None = Config.EMBEDDING_TORCH_COMPILE)
+            dtype: Encoder precision 'fp32', 'bf16' (autocast) or 'int8' (None = Config.EMBEDDING_DTYPE)
         """
         self.model_name = model_name
+        self.compile_model = compile_model if compile_model is not None else Config.EMBEDDING_TORCH_COMPILE
+        self.dtype = dtype or Config.EMBEDDING_DTYPE
+        if self.dtype not in EMBEDDING_DTYPES:
+            logger.warning("Unknown embedding dtype, using fp32", dtype=self.dtype, supported=list(EMBEDDING_DTYPES))
+            self.dtype = 'fp32'
         self.model = None
         self._load_model()
     
     def _load_model(self):
         """Load the Sentence Transformer model."""
         try:
-            from sentence_transformers import SentenceTransformer
             logger.info("Loading Sentence Transformer model", model=self.model_name)
-            self.model = SentenceTransformer(self.model_name)
+            with _MODEL_LOAD_LOCK:
+                self.model = _load_sentence_transformer(self.model_name, self.compile_model, self.dtype)
             logger.info("Model loaded successfully", 
                        model=self.model_name,
                        max_seq_length=self.model.max_seq_length)
@@ -102,7 +302,24 @@ class HuggingFaceEmbeddingProvider(EmbeddingProvider):
             logger.error("Failed to load Sentence Transformer model", error=str(e))
             self.model = None
     
-    def generate_embedding(self, text: str) -> Optional[List[float]]:
+    def _encode(self, sentences):
+        """
+        Encode one text or a list of texts into normalized float32 embeddings.
+        
+        For bf16 the fp32 model runs under bfloat16 autocast. Its output is
+        taken as a tensor and widened to float32 before the numpy conversion,
+        since numpy has no bfloat16.
+        """
+        if self.dtype != 'bf16':
+            embeddings = self.model.encode(sentences, convert_to_numpy=True, normalize_embeddings=True)
+            return embeddings.astype(np.float32, copy=False)
+        
+        import torch
+        with torch.autocast(device_type=self.model.device.type, dtype=torch.bfloat16):
+            embeddings = self.model.encode(sentences, convert_to_tensor=True, normalize_embeddings=True)
+        return embeddings.float().cpu().numpy()
+    
+    def generate_embedding(self, text: str) -> Optional[np.ndarray]:
         """Generate embedding using Sentence Transformers."""
         if not self.model:
             logger.warning("Sentence Transformer model not loaded")
@@ -117,25 +334,48 @@ class HuggingFaceEmbeddingProvider(EmbeddingProvider):
                 logger.debug("Text truncated for embedding", original_length=len(text))
             
             # Generate embedding
-            embedding = self.model.encode(text, convert_to_numpy=True, normalize_embeddings=True)
-            
-            # Convert numpy array to list
-            embedding_list = embedding.tolist()
+            embedding = self._encode(text)
             
             logger.debug("HuggingFace embedding generated", 
-                        dim=len(embedding_list),
+                        dim=embedding.shape[0],
                         model=self.model_name)
-            return embedding_list
+            return embedding
             
         except Exception as e:
             logger.error("HuggingFace embedding generation failed", error=str(e))
             return None
+    
+    def generate_embeddings(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Generate embeddings for all texts in one encode call."""
+        if not self.model:
+            logger.warning("Sentence Transformer model not loaded")
+            return [None] * len(texts)
+        
+        if not texts:
+            return []
+        
+        try:
+            max_length = 512 * 4  # Rough character estimate, as in generate_embedding
+            embeddings = self._encode([text[:max_length] for text in texts])
+            
+            logger.debug("HuggingFace embeddings generated",
+                        count=len(texts),
+                        dim=embeddings.shape[1],
+                        model=self.model_name)
+            return list(embeddings)
+            
+        except Exception as e:
+            logger.error("HuggingFace embedding generation failed", error=str(e))
+            return [None] * len(texts)
 
 
 def create_embedding_provider(provider_type: str = "auto", **kwargs) -> Optional[EmbeddingProvider]:
     """
     Create an embedding provider based on configuration.
     
+    Providers are cached per (provider_type, model_name, api_key), so repeated
+    calls reuse the already-loaded model instead of loading it again.
+    
     Args:
         provider_type: Type of provider to use
                       - "openai": Use OpenAI API
@@ -148,6 +388,18 @@ def create_embedding_provider(provider_type: str = "auto", **kwargs) -> Optional
     Returns:
         EmbeddingProvider instance or None if none available
     """
+    key = (provider_type, kwargs.get('model_name'), kwargs.get('api_key'))
+    with _PROVIDER_CACHE_LOCK:
+        provider = _PROVIDER_CACHE.get(key)
+        if provider is None:
+            provider = _build_embedding_provider(provider_type, **kwargs)
+            if provider is not None:
+                _PROVIDER_CACHE[key] = provider
+        return provider
+
+
+def _build_embedding_provider(provider_type: str, **kwargs) -> Optional[EmbeddingProvider]:
+    """Construct a new embedding provider (see create_embedding_provider)."""
     if provider_type == "auto":
         # Try HuggingFace first (free, no API key needed)
         try:
@@ -208,7 +460,7 @@ def get_embedding_dimension(provider_type: str, model_name: Optional[str] = None
         Embedding dimension
     """
     if provider_type == "openai":
-        return 1536  # OpenAI text-embedding-ada-002
+        return 1536  # OpenAI text-embedding-3-small
     elif provider_type == "huggingface":
         # Common Sentence Transformer dimensions
         if model_name and "mpnet" in model_name.lower():
@@ -1,11 +1,13 @@
 """
 Guardrails system for content safety, validation, and output filtering
 """
+import os
 import re
 import sys
 import json
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Tuple
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
@@ -13,12 +15,120 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 from utils.logger import get_system_logger
 from config import Config
 
+try:
+    import re2  # google-re2: scans all patterns in one linear pass
+except ImportError:
+    re2 = None
+
+try:
+    import ahocorasick  # pyahocorasick: one-pass multi-keyword search
+except ImportError:
+    ahocorasick = None
+
 logger = get_system_logger()
 
+# Harmful content patterns (can be overridden per Guardrails instance)
+_HARMFUL_PATTERNS = (
+    r'\b(violence|violent|harm|kill|murder|attack|assault)\b',
+    r'\b(hate|racist|discrimination|bigotry)\b',
+    r'\b(illegal|drug|weapon|explosive)\b',
+    r'\b(self.harm|suicide|self.injury)\b',
+    # Add more patterns as needed
+)
+
+# Lowercase literals, at least one of which occurs in any match of _HARMFUL_PATTERNS
+# (keep in sync when editing the patterns above)
+_HARMFUL_KEYWORDS = (
+    'violen', 'harm', 'kill', 'murder', 'attack', 'assault',
+    'hate', 'racist', 'discrimination', 'bigotry',
+    'illegal', 'drug', 'weapon', 'explosive',
+    'self', 'suicide',
+)
+
+
+def _build_keyword_automaton(keywords: Sequence[str]) -> Optional[Any]:
+    """Build an Aho-Corasick automaton over keywords (None when pyahocorasick is unavailable)."""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for keyword in keywords:
+        automaton.add_word(keyword, keyword)
+    automaton.make_automaton()
+    return automaton
+
+
+_HARMFUL_AUTOMATON = _build_keyword_automaton(_HARMFUL_KEYWORDS)
+
+# PII patterns (can be overridden per Guardrails instance)
+_PII_PATTERNS = MappingProxyType({
+    'email': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
+    'phone': r'\b(?:\+?1[-.]?)?\(?([0-9]{3})\)?[-.]?([0-9]{3})[-.]?([0-9]{4})\b',
+    'ssn': r'\b\d{3}-\d{2}-\d{4}\b',
+    'credit_card': r'\b\d{4}[- ]?\d{4}[- ]?\d{4}[- ]?\d{4}\b',
+    'ip_address': r'\b(?:\d{1,3}\.){3}\d{1,3}\b',
+    'passport': r'\b[A-Z]{1,2}\d{6,9}\b',
+})
+
+# File names rejected before processing: executables and archives (could contain malware)
+_SUSPICIOUS_FILE_RE = re.compile(r'\.(exe|bat|cmd|scr|vbs|js|zip|rar|7z|tar|gz)$', re.IGNORECASE)
+
+
+def _build_pattern_set(
+    harmful_patterns: Sequence[str],
+    pii_patterns: Mapping[str, str]
+) -> Tuple[Optional[Any], Dict[int, Tuple[str, str]]]:
+    """
+    Compile harmful and PII patterns into a single RE2 set.
+    
+    Returns:
+        Tuple of (pattern set or None, map of set id -> (kind, name))
+    """
+    if re2 is None:
+        return None, {}
+    
+    try:
+        pattern_set = re2.Set.SearchSet()
+        id_to_label = {}
+        for pattern in harmful_patterns:
+            id_to_label[pattern_set.Add('(?i)' + pattern)] = ('harmful', pattern)
+        for pii_type, pattern in pii_patterns.items():
+            id_to_label[pattern_set.Add(pattern)] = ('pii', pii_type)
+        pattern_set.Compile()
+        return pattern_set, id_to_label
+    except Exception as e:
+        logger.warning("Failed to build RE2 pattern set, using re", error=str(e))
+        return None, {}
+
+
+class _CompiledPatterns:
+    """Compiled forms of one harmful/PII pattern configuration."""
+    
+    __slots__ = ('harmful_patterns', 'harmful_keywords', 'pii_patterns', 'harmful', 'pii',
+                 'pii_union', 'pattern_set', 'id_to_label')
+    
+    def __init__(self, harmful_patterns: Sequence[str], pii_patterns: Mapping[str, str]):
+        self.harmful_patterns = tuple(harmful_patterns)
+        self.pii_patterns = MappingProxyType(dict(pii_patterns))
+        # Plain-substring prefilter; only known to be safe for the default patterns
+        self.harmful_keywords = _HARMFUL_KEYWORDS if self.harmful_patterns == _HARMFUL_PATTERNS else None
+        # Used by the re fallback; the union is only used for redaction
+        self.harmful = tuple((p, re.compile(p, re.IGNORECASE)) for p in self.harmful_patterns)
+        self.pii = MappingProxyType({k: re.compile(v) for k, v in self.pii_patterns.items()})
+        self.pii_union = re.compile('|'.join(f'(?P<{k}>{v})' for k, v in self.pii_patterns.items()))
+        # Combined pattern set (None when google-re2 is unavailable)
+        self.pattern_set, self.id_to_label = _build_pattern_set(self.harmful_patterns, self.pii_patterns)
+
+
+# Compiled once per process and shared by every Guardrails using the defaults
+_DEFAULT_PATTERNS = _CompiledPatterns(_HARMFUL_PATTERNS, _PII_PATTERNS)
+
 
 class Guardrails:
     """Content safety guardrails and validation."""
     
+    # Per-field character cap for output text, also applied to the guardrail scans
+    MAX_TEXT_LENGTH = 50000  # 50KB limit
+    
     def __init__(
         self,
         enable_content_filter: Optional[bool] = None,
@@ -26,7 +136,9 @@ class Guardrails:
         enable_category_restrictions: Optional[bool] = None,
         allowed_categories: Optional[List[str]] = None,
         blocked_categories: Optional[List[str]] = None,
-        min_quality_threshold: Optional[float] = None
+        min_quality_threshold: Optional[float] = None,
+        harmful_patterns: Optional[Sequence[str]] = None,
+        pii_patterns: Optional[Mapping[str, str]] = None
     ):
         """
         Initialize guardrails.
@@ -38,33 +150,34 @@ class Guardrails:
             allowed_categories: List of allowed categories (None = all allowed)
             blocked_categories: List of blocked categories
             min_quality_threshold: Minimum quality score to pass
+            harmful_patterns: Custom harmful content patterns (None = shared defaults)
+            pii_patterns: Custom PII type -> pattern map (None = shared defaults)
         """
         # Use config defaults if not provided
         self.enable_content_filter = enable_content_filter if enable_content_filter is not None else Config.ENABLE_CONTENT_FILTER
         self.enable_pii_detection = enable_pii_detection if enable_pii_detection is not None else Config.ENABLE_PII_DETECTION
         self.enable_category_restrictions = enable_category_restrictions if enable_category_restrictions is not None else Config.ENABLE_CATEGORY_RESTRICTIONS
-        self.allowed_categories = allowed_categories if allowed_categories is not None else Config.ALLOWED_CATEGORIES
-        self.blocked_categories = blocked_categories if blocked_categories is not None else Config.BLOCKED_CATEGORIES
+        # Stored as frozensets for constant-time membership checks
+        self.allowed_categories = frozenset(allowed_categories if allowed_categories is not None else Config.ALLOWED_CATEGORIES)
+        self.blocked_categories = frozenset(blocked_categories if blocked_categories is not None else Config.BLOCKED_CATEGORIES)
         self.min_quality_threshold = min_quality_threshold if min_quality_threshold is not None else Config.MIN_QUALITY_THRESHOLD
         
-        # Harmful content patterns (can be customized)
-        self.harmful_patterns = [
-            r'\b(violence|violent|harm|kill|murder|attack|assault)\b',
-            r'\b(hate|racist|discrimination|bigotry)\b',
-            r'\b(illegal|drug|weapon|explosive)\b',
-            r'\b(self.harm|suicide|self.injury)\b',
-            # Add more patterns as needed
-        ]
-        
-        # PII patterns
-        self.pii_patterns = {
-            'email': r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
-            'phone': r'\b(?:\+?1[-.]?)?\(?([0-9]{3})\)?[-.]?([0-9]{3})[-.]?([0-9]{4})\b',
-            'ssn': r'\b\d{3}-\d{2}-\d{4}\b',
-            'credit_card': r'\b\d{4}[- ]?\d{4}[- ]?\d{4}[- ]?\d{4}\b',
-            'ip_address': r'\b(?:\d{1,3}\.){3}\d{1,3}\b',
-            'passport': r'\b[A-Z]{1,2}\d{6,9}\b',
-        }
+        # Only custom pattern configurations are compiled per instance
+        if harmful_patterns is None and pii_patterns is None:
+            patterns = _DEFAULT_PATTERNS
+        else:
+            patterns = _CompiledPatterns(
+                harmful_patterns if harmful_patterns is not None else _HARMFUL_PATTERNS,
+                pii_patterns if pii_patterns is not None else _PII_PATTERNS
+            )
+        self.harmful_patterns = patterns.harmful_patterns
+        self.pii_patterns = patterns.pii_patterns
+        self._harmful_compiled = patterns.harmful
+        self._harmful_keywords = patterns.harmful_keywords
+        self._pii_compiled = patterns.pii
+        self._pii_union = patterns.pii_union
+        self._pattern_set = patterns.pattern_set
+        self._id_to_label = patterns.id_to_label
         
         logger.info("Guardrails initialized",
                    content_filter=self.enable_content_filter,
@@ -72,6 +185,15 @@ class Guardrails:
                    category_restrictions=self.enable_category_restrictions,
                    min_quality=self.min_quality_threshold)
     
+    def _match_set(self, text_content: str, kind: str) -> List[str]:
+        """Return names of set patterns of the given kind that match, in definition order."""
+        labels = []
+        for pattern_id in sorted(self._pattern_set.Match(text_content)):
+            label_kind, name = self._id_to_label[pattern_id]
+            if label_kind == kind:
+                labels.append(name)
+        return labels
+    
     def validate_output(self, result: Dict[str, Any]) -> Tuple[bool, List[str], Dict[str, Any]]:
         """
         Validate output against all guardrails.
@@ -83,7 +205,8 @@ class Guardrails:
             Tuple of (is_valid, violations, sanitized_result)
         """
         violations = []
-        sanitized_result = result.copy()
+        # The only copy; the sanitize steps below mutate it in place
+        sanitized_result = dict(result)
         
         # 1. Quality threshold check
         quality_score = result.get('quality_score', 0)
@@ -105,24 +228,34 @@ class Guardrails:
                 violations.append(f"Category '{category}' not in allowed list")
                 logger.warning("Category not in allowed list", category=category)
         
+        # Text shared by the content safety and PII scans; labels are serialized once
+        labels_json = ''
+        scan_text = ''
+        if self.enable_content_filter or self.enable_pii_detection:
+            labels_json = json.dumps(result['labels']) if result.get('labels') else ''
+            scan_text = self._collect_scan_text(result, labels_json)
+        
         # 3. Content safety check
         if self.enable_content_filter:
-            content_violations = self._check_content_safety(result)
+            safety_text = scan_text
+            if result.get('category_reasoning'):
+                safety_text += result['category_reasoning'][:self.MAX_TEXT_LENGTH] + " "
+            content_violations = self._check_content_safety(safety_text)
             violations.extend(content_violations)
             if content_violations:
                 logger.warning("Content safety violations detected", violations=content_violations)
         
         # 4. PII detection
         if self.enable_pii_detection:
-            pii_found = self._detect_pii(result)
+            pii_found = self._detect_pii(scan_text)
             if pii_found:
                 violations.append(f"PII detected: {', '.join(pii_found)}")
                 logger.warning("PII detected in output", pii_types=pii_found)
                 # Sanitize PII
-                sanitized_result = self._sanitize_pii(sanitized_result, pii_found)
+                self._sanitize_pii(sanitized_result, pii_found)
         
         # 5. Output sanitization
-        sanitized_result = self._sanitize_output(sanitized_result)
+        self._sanitize_output(sanitized_result)
         
         # Add guardrail metadata
         sanitized_result['guardrails'] = {
@@ -136,81 +269,124 @@ class Guardrails:
         is_valid = len(violations) == 0
         return is_valid, violations, sanitized_result
     
-    def _check_content_safety(self, result: Dict[str, Any]) -> List[str]:
-        """Check for harmful or inappropriate content."""
-        violations = []
-        text_content = ""
+    def _collect_scan_text(self, result: Dict[str, Any], labels_json: str) -> str:
+        """
+        Concatenate the result's text fields and serialized labels for scanning.
         
-        # Collect all text content
+        Each field is capped at MAX_TEXT_LENGTH characters first, so content and PII
+        detection are best-effort beyond that point but scan cost stays bounded.
+        """
+        cap = self.MAX_TEXT_LENGTH
+        parts = []
         if result.get('raw_text'):
-            text_content += result['raw_text'] + " "
+            parts.append(result['raw_text'][:cap])
         if result.get('visual_features'):
-            text_content += result['visual_features'] + " "
-        if result.get('labels'):
-            text_content += json.dumps(result['labels']) + " "
-        if result.get('category_reasoning'):
-            text_content += result['category_reasoning'] + " "
+            parts.append(result['visual_features'][:cap])
+        if labels_json:
+            parts.append(labels_json[:cap])
+        return "".join(part + " " for part in parts)
+    
+    def _check_content_safety(self, text_content: str) -> List[str]:
+        """Check prebuilt scan text for harmful or inappropriate content."""
+        violations = []
+        
+        # Cheap substring prescreen: no keyword means no pattern can match. Only
+        # ASCII text is prescreened; str.lower() doesn't fold characters such as
+        # 'ſ' that the IGNORECASE patterns match, so other text goes to the patterns
+        if self._harmful_keywords is not None and text_content.isascii():
+            lowered = text_content.lower()
+            if _HARMFUL_AUTOMATON is not None:
+                # Single pass for all keywords; stop at the first hit
+                if next(_HARMFUL_AUTOMATON.iter(lowered), None) is None:
+                    return violations
+            elif not any(keyword in lowered for keyword in self._harmful_keywords):
+                return violations
         
         # Check against harmful patterns
-        for pattern in self.harmful_patterns:
-            matches = re.findall(pattern, text_content, re.IGNORECASE)
-            if matches:
+        if self._pattern_set is not None:
+            for pattern in self._match_set(text_content, 'harmful'):
+                violations.append(f"Harmful content pattern detected: {pattern}")
+            return violations
+        
+        for pattern, compiled in self._harmful_compiled:
+            if compiled.search(text_content):
                 violations.append(f"Harmful content pattern detected: {pattern}")
         
         return violations
     
-    def _detect_pii(self, result: Dict[str, Any]) -> List[str]:
-        """Detect personally identifiable information."""
-        pii_found = []
-        text_content = ""
-        
-        # Collect all text content
-        if result.get('raw_text'):
-            text_content += result['raw_text'] + " "
-        if result.get('visual_features'):
-            text_content += result['visual_features'] + " "
-        if result.get('labels'):
-            text_content += json.dumps(result['labels']) + " "
-        
+    def _detect_pii(self, text_content: str) -> List[str]:
+        """Detect personally identifiable information in prebuilt scan text."""
         # Check for PII patterns
-        for pii_type, pattern in self.pii_patterns.items():
-            if re.search(pattern, text_content):
-                pii_found.append(pii_type)
-        
+        if self._pattern_set is not None:
+            return self._match_set(text_content, 'pii')
+        
+        # Each type is searched on its own: in a single alternation, overlapping
+        # matches (a phone number inside an email address) hide each other
+        pii_found = [
+            pii_type for pii_type, compiled in self._pii_compiled.items()
+            if compiled.search(text_content)
+        ]
         return pii_found
     
     def _sanitize_pii(self, result: Dict[str, Any], pii_types: List[str]) -> Dict[str, Any]:
-        """Sanitize PII from result."""
-        sanitized = result.copy()
+        """
+        Sanitize PII from result in place.
+        
+        The caller owns result and must pass a copy if the original is to be kept.
+        """
+        sanitized = result
+        redacted_types = frozenset(pii_types)
+        
+        def redact(match: re.Match) -> str:
+            # One pass for all PII types; the matching alternative names the type
+            pii_type = match.lastgroup
+            if pii_type in redacted_types:
+                return f'[REDACTED_{pii_type.upper()}]'
+            return match.group()
         
         # Redact PII from text fields
         for field in ['raw_text', 'visual_features']:
             if field in sanitized and sanitized[field]:
-                text = sanitized[field]
-                for pii_type in pii_types:
-                    pattern = self.pii_patterns.get(pii_type, '')
-                    if pattern:
-                        text = re.sub(pattern, f'[REDACTED_{pii_type.upper()}]', text)
-                sanitized[field] = text
-        
-        # Sanitize labels JSON
+                sanitized[field] = self._redact_strings(sanitized[field], self._pii_union, redact)
+        
+        # Redact PII from the string keys and values of the labels structure
         if 'labels' in sanitized and sanitized['labels']:
-            labels_str = json.dumps(sanitized['labels'])
-            for pii_type in pii_types:
-                pattern = self.pii_patterns.get(pii_type, '')
-                if pattern:
-                    labels_str = re.sub(pattern, f'[REDACTED_{pii_type.upper()}]', labels_str)
-            try:
-                sanitized['labels'] = json.loads(labels_str)
-            except:
-                pass  # Keep original if parsing fails
+            sanitized['labels'] = self._redact_strings(sanitized['labels'], self._pii_union, redact)
         
         logger.info("PII sanitized", pii_types=pii_types)
         return sanitized
     
+    @staticmethod
+    def _redact_strings(obj: Any, pattern: re.Pattern, repl: Callable[[re.Match], str]) -> Any:
+        """
+        Apply a substitution to every string in a nested structure.
+        
+        Args:
+            obj: String, dict, list/tuple or other value
+            pattern: Compiled pattern to substitute
+            repl: Replacement function called with each match
+            
+        Returns:
+            Redacted copy of containers; non-string leaves are returned unchanged
+        """
+        if isinstance(obj, str):
+            return pattern.sub(repl, obj)
+        if isinstance(obj, dict):
+            return {
+                Guardrails._redact_strings(key, pattern, repl): Guardrails._redact_strings(value, pattern, repl)
+                for key, value in obj.items()
+            }
+        if isinstance(obj, (list, tuple)):
+            return [Guardrails._redact_strings(item, pattern, repl) for item in obj]
+        return obj
+    
     def _sanitize_output(self, result: Dict[str, Any]) -> Dict[str, Any]:
-        """General output sanitization."""
-        sanitized = result.copy()
+        """
+        General output sanitization, applied to result in place.
+        
+        The caller owns result and must pass a copy if the original is to be kept.
+        """
+        sanitized = result
         
         # Remove or sanitize sensitive fields
         # Ensure no None values in critical fields
@@ -220,7 +396,7 @@ class Guardrails:
                 sanitized['file_path'] = sanitized.get('file_name', 'file')
         
         # Ensure string fields are not too long
-        max_text_length = 50000  # 50KB limit
+        max_text_length = self.MAX_TEXT_LENGTH
         for field in ['raw_text', 'visual_features']:
             if field in sanitized and sanitized[field]:
                 if len(sanitized[field]) > max_text_length:
@@ -264,24 +440,18 @@ class Guardrails:
         violations = []
         
         # Check file name for suspicious patterns
-        suspicious_patterns = [
-            r'\.(exe|bat|cmd|scr|vbs|js)$',  # Executable files
-            r'\.(zip|rar|7z|tar|gz)$',  # Archive files (could contain malware)
-        ]
-        
-        for pattern in suspicious_patterns:
-            if re.search(pattern, file_name, re.IGNORECASE):
-                violations.append(f"File type not allowed: {file_name}")
+        if _SUSPICIOUS_FILE_RE.search(file_name):
+            violations.append(f"File type not allowed: {file_name}")
         
         # Check file size (if needed)
         try:
-            import os
-            file_size = os.path.getsize(file_path)
+            file_size = os.stat(file_path).st_size
+        except OSError as e:
+            logger.debug("Could not stat file for size check", file_path=file_path, error=str(e))
+        else:
             max_size = 100 * 1024 * 1024  # 100MB
             if file_size > max_size:
                 violations.append(f"File size {file_size} exceeds maximum {max_size}")
-        except:
-            pass
         
         return len(violations) == 0, violations
 
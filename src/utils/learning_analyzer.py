@@ -1,12 +1,16 @@
 """
 Learning Analyzer - Analyzes experiences to provide insights and improvements
 """
+import heapq
 from typing import Dict, Any, List
 from collections import defaultdict
 from utils.logger import get_system_logger
 
 logger = get_system_logger()
 
+# Shared read-only stand-in for a missing experience result
+_EMPTY: Dict[str, Any] = {}
+
 
 class LearningAnalyzer:
     """Analyzes stored experiences to identify patterns and improvements."""
@@ -35,50 +39,56 @@ class LearningAnalyzer:
                 'message': 'No experiences to analyze yet'
             }
         
-        # Calculate statistics
+        # Calculate statistics, breakdowns included, in a single pass
         total = len(experiences)
-        successful = sum(1 for exp in experiences if exp.get('success', False))
-        avg_quality = sum(exp.get('quality_score', 0) for exp in experiences) / total
-        avg_time = sum(exp.get('processing_time', 0) for exp in experiences) / total
-        
-        # Modality breakdown
-        modality_stats = defaultdict(lambda: {'count': 0, 'avg_quality': 0, 'success_rate': 0})
-        for exp in experiences:
-            modality = exp.get('result', {}).get('modality', 'unknown')
-            modality_stats[modality]['count'] += 1
-            modality_stats[modality]['avg_quality'] += exp.get('quality_score', 0)
-            modality_stats[modality]['success'] = modality_stats[modality].get('success', 0) + (1 if exp.get('success') else 0)
-        
-        for modality in modality_stats:
-            count = modality_stats[modality]['count']
-            modality_stats[modality]['avg_quality'] /= count
-            modality_stats[modality]['success_rate'] = modality_stats[modality]['success'] / count
-        
-        # Category breakdown
+        successful = 0
+        quality_sum = 0
+        time_sum = 0
+        modality_stats = defaultdict(lambda: {'count': 0, 'avg_quality': 0, 'success_rate': 0, 'success': 0})
         category_stats = defaultdict(lambda: {'count': 0, 'avg_quality': 0})
-        for exp in experiences:
-            category = exp.get('result', {}).get('category', 'uncategorized')
-            category_stats[category]['count'] += 1
-            category_stats[category]['avg_quality'] += exp.get('quality_score', 0)
+        method_stats = defaultdict(lambda: {'count': 0, 'avg_quality': 0, 'success_rate': 0, 'success': 0})
         
-        for category in category_stats:
-            category_stats[category]['avg_quality'] /= category_stats[category]['count']
+        # Bound locally to skip per-iteration attribute lookups in the loop
+        get = dict.get
         
-        # Extraction method performance
-        method_stats = defaultdict(lambda: {'count': 0, 'avg_quality': 0, 'success_rate': 0})
         for exp in experiences:
-            method = exp.get('result', {}).get('extraction_method', 'unknown')
-            method_stats[method]['count'] += 1
-            method_stats[method]['avg_quality'] += exp.get('quality_score', 0)
-            method_stats[method]['success'] = method_stats[method].get('success', 0) + (1 if exp.get('success') else 0)
-        
-        for method in method_stats:
-            count = method_stats[method]['count']
-            method_stats[method]['avg_quality'] /= count
-            method_stats[method]['success_rate'] = method_stats[method]['success'] / count
+            quality = get(exp, 'quality_score', 0)
+            success = 1 if get(exp, 'success') else 0
+            result = get(exp, 'result') or _EMPTY
+            
+            successful += success
+            quality_sum += quality
+            time_sum += get(exp, 'processing_time', 0)
+            
+            # Modality breakdown
+            stats = modality_stats[get(result, 'modality', 'unknown')]
+            stats['count'] += 1
+            stats['avg_quality'] += quality
+            stats['success'] += success
+            
+            # Category breakdown
+            stats = category_stats[get(result, 'category', 'uncategorized')]
+            stats['count'] += 1
+            stats['avg_quality'] += quality
+            
+            # Extraction method performance
+            stats = method_stats[get(result, 'extraction_method', 'unknown')]
+            stats['count'] += 1
+            stats['avg_quality'] += quality
+            stats['success'] += success
+        
+        avg_quality = quality_sum / total
+        avg_time = time_sum / total
+        
+        # Turn sums into averages
+        for stats in category_stats.values():
+            stats['avg_quality'] /= stats['count']
+        for stats in (*modality_stats.values(), *method_stats.values()):
+            stats['avg_quality'] /= stats['count']
+            stats['success_rate'] = stats['success'] / stats['count']
         
         # Quality trends
-        recent_experiences = sorted(experiences, key=lambda x: x.get('timestamp', ''), reverse=True)[:10]
+        recent_experiences = heapq.nlargest(10, experiences, key=lambda x: x.get('timestamp', ''))
         recent_avg_quality = sum(exp.get('quality_score', 0) for exp in recent_experiences) / len(recent_experiences) if recent_experiences else 0
         
         return {
@@ -4,10 +4,24 @@ Structured logging system for the agentic AI platform
 import logging
 import sys
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional
 from pathlib import Path
 import json
 
+# Level name -> numeric level, resolved once
+_LEVELS = {name: getattr(logging, name) for name in ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")}
+
+
+class ContextFormatter(logging.Formatter):
+    """Formatter that appends a record's structured context as ' | key=value' pairs."""
+    
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        context = getattr(record, 'ctx', None)
+        if context:
+            context_str = " | ".join([f"{k}={v}" for k, v in context.items()])
+            record.message = f"{record.message} | {context_str}"
+        return super().formatMessage(record)
+
 
 class StructuredLogger:
     """Structured logger with context support."""
@@ -35,7 +49,7 @@ class StructuredLogger:
         if self.logger.handlers:
             return
         
-        formatter = logging.Formatter(
+        formatter = ContextFormatter(
             '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
             datefmt='%Y-%m-%d %H:%M:%S'
         )
@@ -55,14 +69,14 @@ class StructuredLogger:
             self.logger.addHandler(file_handler)
     
     def _log_with_context(self, level: str, message: str, **context):
-        """Log with additional context."""
-        if context:
-            context_str = " | ".join([f"{k}={v}" for k, v in context.items()])
-            full_message = f"{message} | {context_str}"
-        else:
-            full_message = message
+        """Log with additional context (formatted only if a handler emits the record)."""
+        level_no = _LEVELS[level]
+        if not self.logger.isEnabledFor(level_no):
+            return
         
-        getattr(self.logger, level.lower())(full_message)
+        exc_info = context.pop('exc_info', False)
+        self.logger.log(level_no, message, exc_info=exc_info,
+                        extra={'ctx': context} if context else None)
     
     def debug(self, message: str, **context):
         """Log debug message."""
@@ -92,6 +106,7 @@ class StructuredLogger:
 # Global logger instances
 _system_logger: Optional[StructuredLogger] = None
 _agent_logger: Optional[StructuredLogger] = None
+_agent_loggers: Dict[str, StructuredLogger] = {}
 
 
 def get_system_logger() -> StructuredLogger:
@@ -108,13 +123,16 @@ def get_system_logger() -> StructuredLogger:
 
 
 def get_agent_logger(agent_id: str) -> StructuredLogger:
-    """Get agent-specific logger instance."""
-    return StructuredLogger(
-        f"agent.{agent_id}",
-        log_level="INFO",
-        log_file=f"logs/agents/{agent_id}.log",
-        enable_console=True
-    )
+    """Get agent-specific logger instance (one per agent_id)."""
+    agent_logger = _agent_loggers.get(agent_id)
+    if agent_logger is None:
+        agent_logger = _agent_loggers.setdefault(agent_id, StructuredLogger(
+            f"agent.{agent_id}",
+            log_level="INFO",
+            log_file=f"logs/agents/{agent_id}.log",
+            enable_console=True
+        ))
+    return agent_logger
 
 
 # Backward compatibility: print wrapper
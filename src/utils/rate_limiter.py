@@ -2,20 +2,38 @@
 Rate limiting utilities for API endpoints
 """
 from functools import wraps
-from flask import request, jsonify
-from datetime import datetime, timedelta
-from collections import defaultdict
+from flask import request, jsonify, g
+from datetime import datetime
+from collections import defaultdict, deque
 from threading import Lock
 from typing import Dict, Tuple
 import time
 
 
+class _Shard:
+    """One independently locked slice of the rate limiter state."""
+    
+    __slots__ = ('requests', 'lock', 'checks', 'max_window')
+    
+    def __init__(self):
+        # Request times per identifier, oldest first, as time.monotonic() values
+        self.requests: Dict[str, deque] = defaultdict(deque)
+        self.lock = Lock()
+        self.checks = 0
+        self.max_window = 0
+
+
 class RateLimiter:
     """Simple in-memory rate limiter (can be replaced with Redis in production)."""
     
+    # Drop idle identifiers every this many checks (per shard)
+    SWEEP_INTERVAL = 1000
+    
+    # Identifiers are spread over this many independently locked shards (power of two)
+    NUM_SHARDS = 16
+    
     def __init__(self):
-        self.requests: Dict[str, list] = defaultdict(list)
-        self.lock = Lock()
+        self._shards = [_Shard() for _ in range(self.NUM_SHARDS)]
     
     def is_allowed(
         self,
@@ -34,43 +52,65 @@ class RateLimiter:
         Returns:
             Tuple of (is_allowed, info_dict)
         """
-        with self.lock:
-            now = datetime.now()
-            window_start = now - timedelta(seconds=window_seconds)
+        shard = self._shards[hash(identifier) & (self.NUM_SHARDS - 1)]
+        with shard.lock:
+            now = time.monotonic()
+            window_start = now - window_seconds
+            
+            shard.checks += 1
+            shard.max_window = max(shard.max_window, window_seconds)
+            if shard.checks % self.SWEEP_INTERVAL == 0:
+                self._sweep_idle(shard, now)
             
             # Clean old requests
-            self.requests[identifier] = [
-                req_time for req_time in self.requests[identifier]
-                if req_time > window_start
-            ]
+            reqs = shard.requests[identifier]
+            while reqs and reqs[0] <= window_start:
+                reqs.popleft()
             
             # Check limit
-            if len(self.requests[identifier]) >= max_requests:
-                reset_time = self.requests[identifier][0] + timedelta(seconds=window_seconds)
+            if len(reqs) >= max_requests:
+                retry_after = reqs[0] + window_seconds - now
                 return False, {
                     'allowed': False,
                     'limit': max_requests,
                     'remaining': 0,
-                    'reset_at': reset_time.isoformat(),
-                    'retry_after': int((reset_time - now).total_seconds())
+                    'reset_at': datetime.fromtimestamp(time.time() + retry_after).isoformat(),
+                    'retry_after': int(retry_after)
                 }
             
             # Add current request
-            self.requests[identifier].append(now)
+            reqs.append(now)
             
             return True, {
                 'allowed': True,
                 'limit': max_requests,
-                'remaining': max_requests - len(self.requests[identifier]),
-                'reset_at': (now + timedelta(seconds=window_seconds)).isoformat()
+                'remaining': max_requests - len(reqs),
+                'reset_at': datetime.fromtimestamp(time.time() + window_seconds).isoformat()
             }
     
+    @staticmethod
+    def _sweep_idle(shard: _Shard, now: float) -> None:
+        """Remove a shard's identifiers with no requests inside its largest window (lock held)."""
+        cutoff = now - shard.max_window
+        idle = [key for key, reqs in shard.requests.items() if not reqs or reqs[-1] <= cutoff]
+        for key in idle:
+            del shard.requests[key]
+    
     def get_client_identifier(self) -> str:
-        """Get client identifier from request."""
+        """Get client identifier from request (computed once per request)."""
+        identifier = getattr(g, '_rl_id', None)
+        if identifier is not None:
+            return identifier
+        
         # Use IP address as identifier
-        if request.headers.get('X-Forwarded-For'):
-            return request.headers.get('X-Forwarded-For').split(',')[0].strip()
-        return request.remote_addr or 'unknown'
+        forwarded_for = request.headers.get('X-Forwarded-For')
+        if forwarded_for:
+            identifier = forwarded_for.split(',')[0].strip()
+        else:
+            identifier = request.remote_addr or 'unknown'
+        
+        g._rl_id = identifier
+        return identifier
 
 
 # Global rate limiter instance
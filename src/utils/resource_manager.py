@@ -2,20 +2,67 @@
 Resource management for file cleanup and resource tracking
 """
 import os
-import atexit
+import sys
+import shutil
 import weakref
-from pathlib import Path
-from typing import Set, Optional
+from collections import defaultdict
+from typing import Set, Optional, List
 from datetime import datetime, timedelta
 from threading import Lock
+from concurrent.futures import ThreadPoolExecutor
 from utils.logger import get_system_logger
+from config import Config
 
 logger = get_system_logger()
 
 
+class ShardedPathSet:
+    """Set of paths split across independently locked shards."""
+    
+    # Number of shards (power of two)
+    NUM_SHARDS = 16
+    
+    def __init__(self):
+        self._shards: List[Set[str]] = [set() for _ in range(self.NUM_SHARDS)]
+        self._locks = [Lock() for _ in range(self.NUM_SHARDS)]
+    
+    def add(self, path: str):
+        """Add a path, locking only its shard."""
+        idx = hash(path) & (self.NUM_SHARDS - 1)
+        with self._locks[idx]:
+            self._shards[idx].add(path)
+    
+    def discard(self, path: str):
+        """Remove a path if present, locking only its shard."""
+        idx = hash(path) & (self.NUM_SHARDS - 1)
+        with self._locks[idx]:
+            self._shards[idx].discard(path)
+    
+    def drain(self) -> List[str]:
+        """Remove and return all paths, taking shard locks in index order."""
+        drained = []
+        for idx in range(self.NUM_SHARDS):
+            with self._locks[idx]:
+                shard, self._shards[idx] = self._shards[idx], set()
+            drained.extend(shard)
+        return drained
+    
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+
 class ResourceManager:
     """Manages file resources and ensures cleanup."""
     
+    # Tracked-file count above which cleanup_all unlinks relative to directory fds
+    BATCH_UNLINK_THRESHOLD = 64
+    
+    # Entry count above which cleanup_old_files stats/unlinks on a thread pool,
+    # when enabled (Config.RESOURCE_MGR_PARALLEL, useful on NFS/SMB mounts)
+    PARALLEL_CLEANUP = Config.RESOURCE_MGR_PARALLEL
+    PARALLEL_CLEANUP_THRESHOLD = 32
+    PARALLEL_CLEANUP_WORKERS = 16
+    
     def __init__(self, cleanup_interval_minutes: int = 60):
         """
         Initialize resource manager.
@@ -23,13 +70,14 @@ class ResourceManager:
         Args:
             cleanup_interval_minutes: Interval for automatic cleanup
         """
-        self.tracked_files: Set[str] = set()
+        self.tracked_files = ShardedPathSet()
         self.tracked_dirs: Set[str] = set()
         self.lock = Lock()
         self.cleanup_interval = cleanup_interval_minutes
         
-        # Register cleanup on exit
-        atexit.register(self.cleanup_all)
+        # Clean up on exit without pinning the manager; the finalizer
+        # holds only the tracked set, so an abandoned manager can be collected
+        self._finalizer = weakref.finalize(self, self._cleanup_files, self.tracked_files)
     
     def track_file(self, file_path: str, auto_cleanup: bool = True):
         """
@@ -39,9 +87,9 @@ class ResourceManager:
             file_path: Path to file
             auto_cleanup: Whether to auto-cleanup on exit
         """
-        with self.lock:
-            self.tracked_files.add(file_path)
-            logger.debug("Tracking file", file_path=file_path, auto_cleanup=auto_cleanup)
+        # Interned so repeated paths share one string and its cached hash
+        self.tracked_files.add(sys.intern(file_path))
+        logger.debug("Tracking file", file_path=file_path, auto_cleanup=auto_cleanup)
     
     def track_directory(self, dir_path: str, auto_cleanup: bool = False):
         """
@@ -66,11 +114,16 @@ class ResourceManager:
         Returns:
             True if successful
         """
+        return self._remove_file(file_path, ignore_errors)
+    
+    @staticmethod
+    def _remove_file(file_path: str, ignore_errors: bool = True) -> bool:
+        """Delete a file (see cleanup_file); needs no manager instance."""
         try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                logger.debug("Cleaned up file", file_path=file_path)
-                return True
+            os.unlink(file_path)
+            logger.debug("Cleaned up file", file_path=file_path)
+            return True
+        except FileNotFoundError:
             return False
         except Exception as e:
             if not ignore_errors:
@@ -92,14 +145,13 @@ class ResourceManager:
             True if successful
         """
         try:
-            if os.path.exists(dir_path):
-                if recursive:
-                    import shutil
-                    shutil.rmtree(dir_path)
-                else:
-                    os.rmdir(dir_path)
-                logger.debug("Cleaned up directory", dir_path=dir_path, recursive=recursive)
-                return True
+            if recursive:
+                self._remove_tree(dir_path)
+            else:
+                os.rmdir(dir_path)
+            logger.debug("Cleaned up directory", dir_path=dir_path, recursive=recursive)
+            return True
+        except FileNotFoundError:
             return False
         except Exception as e:
             if not ignore_errors:
@@ -108,10 +160,39 @@ class ResourceManager:
             logger.warning("Failed to cleanup directory (ignored)", dir_path=dir_path, error=str(e))
             return False
     
+    @staticmethod
+    def _remove_tree(dir_path: str):
+        """
+        Recursively delete a directory tree bottom-up, relative to directory fds.
+        
+        os.fwalk yields an open fd for each directory, so entries are removed with
+        unlink/rmdir(name, dir_fd=...) without re-resolving full paths. Symlinks are
+        removed, never followed. Uses shutil.rmtree where os.fwalk is unavailable (Windows).
+        
+        Args:
+            dir_path: Directory to delete
+        """
+        if not hasattr(os, 'fwalk'):
+            shutil.rmtree(dir_path)
+            return
+        
+        def raise_error(error):
+            raise error
+        
+        for _, dirs, files, root_fd in os.fwalk(dir_path, topdown=False, onerror=raise_error):
+            for name in files:
+                os.unlink(name, dir_fd=root_fd)
+            for name in dirs:
+                try:
+                    os.rmdir(name, dir_fd=root_fd)
+                except NotADirectoryError:
+                    # Symlink to a directory
+                    os.unlink(name, dir_fd=root_fd)
+        os.rmdir(dir_path)
+    
     def untrack_file(self, file_path: str):
         """Stop tracking a file."""
-        with self.lock:
-            self.tracked_files.discard(file_path)
+        self.tracked_files.discard(sys.intern(file_path))
     
     def cleanup_old_files(self, directory: str, max_age_hours: int = 24, pattern: Optional[str] = None):
         """
@@ -123,28 +204,37 @@ class ResourceManager:
             pattern: Optional filename pattern to match
         """
         try:
-            cutoff_time = datetime.now() - timedelta(hours=max_age_hours)
-            dir_path = Path(directory)
+            cutoff_ts = (datetime.now() - timedelta(hours=max_age_hours)).timestamp()
             
-            if not dir_path.exists():
+            if not os.path.exists(directory):
                 return
             
-            cleaned = 0
-            for file_path in dir_path.iterdir():
-                if file_path.is_file():
-                    # Check pattern
-                    if pattern and pattern not in file_path.name:
-                        continue
-                    
+            # scandir entries carry the file type from the directory read,
+            # so only candidate files cost a stat call
+            with os.scandir(directory) as it:
+                # Check pattern before touching file metadata
+                entries = [
+                    entry for entry in it
+                    if (not pattern or pattern in entry.name) and entry.is_file()
+                ]
+            
+            def maybe_delete(entry) -> int:
+                try:
                     # Check age
-                    mtime = datetime.fromtimestamp(file_path.stat().st_mtime)
-                    if mtime < cutoff_time:
-                        try:
-                            file_path.unlink()
-                            cleaned += 1
-                            logger.debug("Cleaned up old file", file_path=str(file_path))
-                        except Exception as e:
-                            logger.warning("Failed to cleanup old file", file_path=str(file_path), error=str(e))
+                    if entry.stat(follow_symlinks=False).st_mtime < cutoff_ts:
+                        os.unlink(entry.path)
+                        logger.debug("Cleaned up old file", file_path=entry.path)
+                        return 1
+                except Exception as e:
+                    logger.warning("Failed to cleanup old file", file_path=entry.path, error=str(e))
+                return 0
+            
+            # On network filesystems each stat/unlink is a round trip; overlap them
+            if self.PARALLEL_CLEANUP and len(entries) > self.PARALLEL_CLEANUP_THRESHOLD:
+                with ThreadPoolExecutor(max_workers=self.PARALLEL_CLEANUP_WORKERS) as pool:
+                    cleaned = sum(pool.map(maybe_delete, entries))
+            else:
+                cleaned = sum(maybe_delete(entry) for entry in entries)
             
             if cleaned > 0:
                 logger.info("Cleaned up old files", directory=directory, count=cleaned)
@@ -154,32 +244,81 @@ class ResourceManager:
     
     def cleanup_all(self):
         """Clean up all tracked resources."""
+        self._cleanup_files(self.tracked_files)
+    
+    @staticmethod
+    def _cleanup_files(tracked_files: ShardedPathSet):
+        """
+        Delete and forget every tracked file.
+        
+        Takes the tracked set explicitly rather than the manager so it can run
+        as the weakref finalizer at interpreter exit.
+        
+        Args:
+            tracked_files: Set of tracked file paths
+        """
         logger.info("Cleaning up all tracked resources")
         
-        with self.lock:
-            files_to_clean = list(self.tracked_files)
-            self.tracked_files.clear()
+        files_to_clean = tracked_files.drain()
+        
+        if len(files_to_clean) > ResourceManager.BATCH_UNLINK_THRESHOLD and os.unlink in os.supports_dir_fd:
+            ResourceManager._unlink_batch(files_to_clean)
+            return
         
         for file_path in files_to_clean:
-            self.cleanup_file(file_path, ignore_errors=True)
+            ResourceManager._remove_file(file_path, ignore_errors=True)
+    
+    @staticmethod
+    def _unlink_batch(file_paths: List[str]) -> int:
+        """
+        Delete many files, opening each parent directory once.
+        
+        Files are grouped by directory and removed with unlink(name, dir_fd=...),
+        so the kernel resolves each directory path once rather than per file.
+        Falls back to per-file removal for a directory that cannot be opened.
+        
+        Args:
+            file_paths: Paths of files to delete
+            
+        Returns:
+            Number of files deleted
+        """
+        by_dir = defaultdict(list)
+        for file_path in file_paths:
+            by_dir[os.path.dirname(os.path.abspath(file_path))].append(file_path)
+        
+        cleaned = 0
+        for dir_path, paths in by_dir.items():
+            try:
+                dir_fd = os.open(dir_path, os.O_RDONLY | os.O_DIRECTORY)
+            except OSError:
+                cleaned += sum(ResourceManager._remove_file(path, ignore_errors=True) for path in paths)
+                continue
+            
+            try:
+                for path in paths:
+                    try:
+                        os.unlink(os.path.basename(path), dir_fd=dir_fd)
+                        cleaned += 1
+                    except FileNotFoundError:
+                        pass
+                    except OSError as e:
+                        logger.warning("Failed to cleanup file (ignored)", file_path=path, error=str(e))
+            finally:
+                os.close(dir_fd)
+        
+        logger.debug("Batch cleaned up files", count=cleaned, directories=len(by_dir))
+        return cleaned
     
     def get_tracked_count(self) -> int:
         """Get count of tracked files."""
-        with self.lock:
-            return len(self.tracked_files)
+        return len(self.tracked_files)
 
 
-# Global resource manager
-_resource_manager: Optional[ResourceManager] = None
+# Global resource manager, built at import so concurrent first calls cannot create two
+_resource_manager = ResourceManager()
 
 
 def get_resource_manager() -> ResourceManager:
     """Get global resource manager instance."""
-    global _resource_manager
-    if _resource_manager is None:
-        _resource_manager = ResourceManager()
     return _resource_manager
-
-
-
-
@@ -1,7 +1,62 @@
 """
 Text processing utilities for chunking and merging
 """
-from typing import List, Dict, Any, Set
+import sys
+from collections import Counter
+from typing import List, Dict, Any, Set, Optional
+import numpy as np
+
+# Sentence boundary characters as bytes, for vectorised boundary search
+_BOUNDARY_BYTES = np.frombuffer(b'.!?\n', dtype=np.uint8)
+
+
+# (label key, merged bucket) for list-valued labels merged as sets
+_SET_FIELDS = (
+    ('topics', 'topics'),
+    ('entities', 'entities'),
+    ('keywords', 'keywords'),
+    ('objects', 'objects'),  # Image-specific
+    ('colors', 'colors'),  # Image-specific
+)
+
+# (label key, merged bucket, lowercase) for single-valued labels resolved by majority vote
+_SCALAR_FIELDS = (
+    ('language', 'languages', True),
+    ('content_type', 'content_types', False),
+    ('scene_type', 'scene_types', False),  # Image-specific
+)
+
+# Label keys merged above or dropped, never copied through as "other" fields
+_EXCLUDE_KEYS = frozenset({
+    'topics', 'entities', 'keywords', 'sentiment', 'language',
+    'content_type', 'objects', 'colors', 'scene_type',
+    'category', 'modality', 'note', 'error',
+})
+
+
+# Common sentiment spellings mapped to interned lowercase forms
+_SENTIMENT_CANON = {
+    variant: sys.intern(sentiment)
+    for sentiment in ('positive', 'negative', 'neutral', 'mixed')
+    for variant in (sentiment, sentiment.upper(), sentiment.capitalize())
+}
+
+
+def _boundary_offsets(text: str) -> Optional[np.ndarray]:
+    """
+    Locate every sentence boundary in text in one vectorised pass.
+    
+    Args:
+        text: Text to scan
+        
+    Returns:
+        Sorted array of boundary indices, or None if text is not ASCII
+        (byte offsets only equal character offsets for ASCII)
+    """
+    if not text.isascii():
+        return None
+    data = np.frombuffer(text.encode('ascii'), dtype=np.uint8)
+    return np.flatnonzero(np.isin(data, _BOUNDARY_BYTES))
 
 
 def split_text_with_overlap(text: str, chunk_size: int = 10000, overlap: int = 500) -> List[str]:
@@ -16,31 +71,42 @@ def split_text_with_overlap(text: str, chunk_size: int = 10000, overlap: int = 5
     Returns:
         List of text chunks
     """
-    if len(text) <= chunk_size:
+    n = len(text)
+    if n <= chunk_size:
         return [text]
     
     chunks = []
     start = 0
+    boundaries = _boundary_offsets(text)
     
-    while start < len(text):
+    while start < n:
         end = start + chunk_size
         
         # If this isn't the last chunk, try to break at a sentence boundary
-        if end < len(text):
+        if end < n:
             # Look for sentence endings within the last 200 chars
             search_start = max(start + chunk_size - 200, start)
-            for i in range(end - 1, search_start, -1):
-                if text[i] in '.!?\n':
-                    end = i + 1
-                    break
+            if boundaries is not None:
+                # Last precomputed boundary before end
+                j = int(np.searchsorted(boundaries, end))
+                boundary = int(boundaries[j - 1]) if j > 0 else -1
+                if boundary <= search_start:
+                    boundary = -1
+            else:
+                boundary = max(text.rfind(ch, search_start + 1, end) for ch in '.!?\n')
+            if boundary >= 0:
+                end = boundary + 1
         
         chunk = text[start:end]
         chunks.append(chunk)
         
+        # Stop once the end of the text is covered; another pass would only
+        # emit the overlap tail again as a duplicate chunk
+        if end >= n:
+            break
+        
         # Move start position with overlap
         start = end - overlap
-        if start >= len(text):
-            break
     
     return chunks
 
@@ -63,11 +129,11 @@ def merge_labels(label_results: List[Dict[str, Any]]) -> Dict[str, Any]:
         'entities': set(),
         'keywords': set(),
         'sentiments': [],
-        'languages': set(),
-        'content_types': set(),
+        'languages': [],
+        'content_types': [],
         'objects': set(),
         'colors': set(),
-        'scene_types': set(),
+        'scene_types': [],
         'other_fields': {}
     }
     
@@ -75,63 +141,29 @@ def merge_labels(label_results: List[Dict[str, Any]]) -> Dict[str, Any]:
         if not isinstance(labels, dict):
             continue
             
-        # Merge topics
-        if 'topics' in labels:
-            topics = labels['topics']
-            if isinstance(topics, list):
-                merged['topics'].update(topics)
-        
-        # Merge entities
-        if 'entities' in labels:
-            entities = labels['entities']
-            if isinstance(entities, list):
-                merged['entities'].update(entities)
-        
-        # Merge keywords
-        if 'keywords' in labels:
-            keywords = labels['keywords']
-            if isinstance(keywords, list):
-                merged['keywords'].update(keywords)
+        # Merge list-valued fields
+        for key, bucket in _SET_FIELDS:
+            value = labels.get(key)
+            if isinstance(value, list):
+                merged[bucket].update(value)
         
         # Collect sentiments for averaging
-        if 'sentiment' in labels:
-            sentiment = labels['sentiment']
-            if sentiment and isinstance(sentiment, str):
-                merged['sentiments'].append(sentiment.lower())
-        
-        # Collect languages
-        if 'language' in labels:
-            lang = labels['language']
-            if lang:
-                merged['languages'].add(str(lang).lower())
-        
-        # Collect content types
-        if 'content_type' in labels:
-            ct = labels['content_type']
-            if ct:
-                merged['content_types'].add(str(ct))
-        
-        # Image-specific fields
-        if 'objects' in labels:
-            objects = labels['objects']
-            if isinstance(objects, list):
-                merged['objects'].update(objects)
-        
-        if 'colors' in labels:
-            colors = labels['colors']
-            if isinstance(colors, list):
-                merged['colors'].update(colors)
+        sentiment = labels.get('sentiment')
+        if sentiment and isinstance(sentiment, str):
+            merged['sentiments'].append(
+                _SENTIMENT_CANON.get(sentiment) or sys.intern(sentiment.lower())
+            )
         
-        if 'scene_type' in labels:
-            scene = labels['scene_type']
-            if scene:
-                merged['scene_types'].add(str(scene))
+        # Collect single-valued fields
+        for key, bucket, lowercase in _SCALAR_FIELDS:
+            value = labels.get(key)
+            if value:
+                value = str(value)
+                merged[bucket].append(value.lower() if lowercase else value)
         
         # Store other fields (take first non-empty value)
         for key, value in labels.items():
-            if key not in ['topics', 'entities', 'keywords', 'sentiment', 'language', 
-                          'content_type', 'objects', 'colors', 'scene_type', 
-                          'category', 'modality', 'note', 'error']:
+            if key not in _EXCLUDE_KEYS:
                 if key not in merged['other_fields'] or not merged['other_fields'][key]:
                     merged['other_fields'][key] = value
     
@@ -140,34 +172,31 @@ def merge_labels(label_results: List[Dict[str, Any]]) -> Dict[str, Any]:
     
     # Convert sets to lists and sort
     if merged['topics']:
-        final_labels['topics'] = sorted(list(merged['topics']))
+        final_labels['topics'] = sorted(merged['topics'])
     if merged['entities']:
-        final_labels['entities'] = sorted(list(merged['entities']))
+        final_labels['entities'] = sorted(merged['entities'])
     if merged['keywords']:
-        final_labels['keywords'] = sorted(list(merged['keywords']))
+        final_labels['keywords'] = sorted(merged['keywords'])
     
-    # Determine dominant sentiment
+    # Determine dominant sentiment (ties go to the first seen)
     if merged['sentiments']:
-        sentiment_counts = {}
-        for s in merged['sentiments']:
-            sentiment_counts[s] = sentiment_counts.get(s, 0) + 1
-        final_labels['sentiment'] = max(sentiment_counts, key=sentiment_counts.get)
+        final_labels['sentiment'] = Counter(merged['sentiments']).most_common(1)[0][0]
     
     # Use most common language
     if merged['languages']:
-        final_labels['language'] = list(merged['languages'])[0]  # Take first, could improve with voting
+        final_labels['language'] = Counter(merged['languages']).most_common(1)[0][0]
     
     # Use most common content type
     if merged['content_types']:
-        final_labels['content_type'] = list(merged['content_types'])[0]
+        final_labels['content_type'] = Counter(merged['content_types']).most_common(1)[0][0]
     
     # Image-specific
     if merged['objects']:
-        final_labels['objects'] = sorted(list(merged['objects']))
+        final_labels['objects'] = sorted(merged['objects'])
     if merged['colors']:
-        final_labels['colors'] = sorted(list(merged['colors']))
+        final_labels['colors'] = sorted(merged['colors'])
     if merged['scene_types']:
-        final_labels['scene_type'] = list(merged['scene_types'])[0]  # Take first
+        final_labels['scene_type'] = Counter(merged['scene_types']).most_common(1)[0][0]
     
     # Add other fields
     final_labels.update(merged['other_fields'])
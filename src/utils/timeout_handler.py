@@ -3,6 +3,8 @@ Timeout handling utilities for API calls and long-running operations
 """
 import signal
 import threading
+import warnings
+import contextvars
 from typing import Callable, Any, Optional
 from contextlib import contextmanager
 from functools import wraps
@@ -19,6 +21,13 @@ def timeout_context(seconds: float):
     """
     Context manager for timeout handling.
     
+    Deprecated: use with_timeout, which works the same on every platform and
+    thread without installing a signal handler per call.
+    
+    The block is interrupted with SIGALRM when running on the main thread of a
+    Unix process. Elsewhere (Windows, worker threads) the block cannot be
+    interrupted; TimeoutError is raised after it finishes if it overran.
+    
     Args:
         seconds: Timeout in seconds
         
@@ -27,45 +36,43 @@ def timeout_context(seconds: float):
             # code that might timeout
             pass
     """
+    warnings.warn(
+        "timeout_context is deprecated; use with_timeout instead",
+        DeprecationWarning,
+        stacklevel=3
+    )
+    
     def timeout_handler(signum, frame):
         raise TimeoutError(f"Operation timed out after {seconds} seconds")
     
-    # Set up signal handler (Unix only)
-    if hasattr(signal, 'SIGALRM'):
+    # Set up signal handler (Unix main thread only)
+    if hasattr(signal, 'SIGALRM') and threading.current_thread() is threading.main_thread():
         old_handler = signal.signal(signal.SIGALRM, timeout_handler)
-        signal.alarm(int(seconds))
+        signal.setitimer(signal.ITIMER_REAL, seconds)
         try:
             yield
         finally:
-            signal.alarm(0)
+            signal.setitimer(signal.ITIMER_REAL, 0)
             signal.signal(signal.SIGALRM, old_handler)
     else:
-        # Windows fallback: use threading
-        result = [None]
-        exception = [None]
-        
-        def target():
-            try:
-                result[0] = True
-            except Exception as e:
-                exception[0] = e
-        
-        thread = threading.Thread(target=target)
-        thread.daemon = True
-        thread.start()
-        thread.join(timeout=seconds)
-        
-        if thread.is_alive():
-            raise TimeoutError(f"Operation timed out after {seconds} seconds")
-        if exception[0]:
-            raise exception[0]
+        start_time = time.monotonic()
         yield
+        if time.monotonic() - start_time > seconds:
+            raise TimeoutError(f"Operation timed out after {seconds} seconds")
 
 
 def with_timeout(seconds: float, default_return: Any = None):
     """
     Decorator for adding timeout to functions.
     
+    Each call runs on its own daemon thread and the caller waits at most
+    `seconds` for its result. A timed-out call is abandoned, not interrupted:
+    it keeps running on its thread until it returns, without holding up
+    later or nested calls.
+    
+    The call sees a copy of the caller's context variables (which carry the
+    Flask request context and g), but not the caller's threading.local data.
+    
     Args:
         seconds: Timeout in seconds
         default_return: Value to return on timeout
@@ -79,57 +86,26 @@ def with_timeout(seconds: float, default_return: Any = None):
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         def wrapper(*args, **kwargs) -> Any:
-            start_time = time.time()
+            context = contextvars.copy_context()
+            outcome = {}
             
-            if hasattr(signal, 'SIGALRM'):
-                # Unix: use signal
-                def timeout_handler(signum, frame):
-                    raise TimeoutError(f"{func.__name__} timed out after {seconds} seconds")
-                
-                old_handler = signal.signal(signal.SIGALRM, timeout_handler)
-                signal.alarm(int(seconds))
+            def run():
                 try:
-                    result = func(*args, **kwargs)
-                    return result
-                except TimeoutError:
-                    if default_return is not None:
-                        return default_return
-                    raise
-                finally:
-                    signal.alarm(0)
-                    signal.signal(signal.SIGALRM, old_handler)
-            else:
-                # Windows: use threading with result queue
-                from queue import Queue
-                result_queue = Queue()
-                exception_queue = Queue()
-                
-                def target():
-                    try:
-                        result = func(*args, **kwargs)
-                        result_queue.put(result)
-                    except Exception as e:
-                        exception_queue.put(e)
-                
-                thread = threading.Thread(target=target)
-                thread.daemon = True
-                thread.start()
-                thread.join(timeout=seconds)
-                
-                if thread.is_alive():
-                    if default_return is not None:
-                        return default_return
-                    raise TimeoutError(f"{func.__name__} timed out after {seconds} seconds")
-                
-                if not exception_queue.empty():
-                    raise exception_queue.get()
-                
-                if not result_queue.empty():
-                    return result_queue.get()
-                
+                    outcome['result'] = context.run(func, *args, **kwargs)
+                except BaseException as e:
+                    outcome['error'] = e
+            
+            thread = threading.Thread(target=run, name=f'timeout-{func.__name__}', daemon=True)
+            thread.start()
+            thread.join(seconds)
+            
+            if thread.is_alive():
                 if default_return is not None:
                     return default_return
-                raise TimeoutError(f"{func.__name__} completed but returned no result")
+                raise TimeoutError(f"{func.__name__} timed out after {seconds} seconds")
+            if 'error' in outcome:
+                raise outcome['error']
+            return outcome['result']
         
         return wrapper
     return decorator
@@ -188,7 +164,3 @@ _timeout_manager = TimeoutManager()
 def get_timeout_manager() -> TimeoutManager:
     """Get global timeout manager instance."""
     return _timeout_manager
-
-
-
-
@@ -0,0 +1,121 @@
+"""
+On-disk cache for audio transcription results
+"""
+import os
+import sys
+import json
+import hashlib
+from pathlib import Path
+from typing import Dict, Any, Optional, Union
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from utils.logger import get_system_logger
+
+logger = get_system_logger()
+
+# Read size for streaming file hashes
+_HASH_CHUNK_SIZE = 65536
+
+# Set to 1 to always call the wrapped extractor
+NO_CACHE_ENV_VAR = 'DATA_LABELING_NO_TRANSCRIPT_CACHE'
+
+DEFAULT_CACHE_DIR = Path.home() / '.cache' / 'data_labeling' / 'transcripts'
+
+
+class CachedExtractor:
+    """
+    Wraps a content extractor and caches its extract_audio results on disk.
+    
+    Results are stored as one JSON file per (audio content, extraction
+    parameters), so reruns on an unchanged file skip transcription entirely.
+    Only successful results are cached. Every other attribute is delegated
+    to the wrapped extractor.
+    """
+    
+    def __init__(
+        self,
+        extractor: Any,
+        cache_dir: Union[str, Path] = DEFAULT_CACHE_DIR,
+        params: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Initialize cached extractor.
+        
+        Args:
+            extractor: Extractor with an extract_audio(file_path) method
+            cache_dir: Directory for cached transcripts (created on first write)
+            params: Extraction parameters that affect the transcript, such as the
+                    model name; part of the cache key (default: whisper-1)
+        """
+        self._inner = extractor
+        self.cache_dir = Path(cache_dir)
+        self.params = params if params is not None else {'model': 'whisper-1'}
+        # Extractor type and parameters are the same for every file
+        self._params_digest = hashlib.sha256(json.dumps(
+            {'extractor': type(extractor).__name__, 'params': self.params},
+            sort_keys=True,
+            default=str
+        ).encode()).hexdigest()
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._inner, name)
+    
+    def _cache_key(self, file_path: str) -> str:
+        """Hash the audio file contents together with the extraction parameters."""
+        key_hash = hashlib.sha256(self._params_digest.encode())
+        with open(file_path, 'rb', buffering=0) as f:
+            for byte_block in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+                key_hash.update(byte_block)
+        return key_hash.hexdigest()
+    
+    def extract_audio(self, file_path: str) -> Dict[str, Any]:
+        """
+        Transcribe audio, reusing a cached transcript when available.
+        
+        Args:
+            file_path: Path to the audio file
+        
+        Returns:
+            Dictionary with transcribed text, as returned by the wrapped extractor
+        """
+        if os.getenv(NO_CACHE_ENV_VAR) == '1':
+            return self._inner.extract_audio(file_path)
+        
+        try:
+            cache_path = self.cache_dir / f"{self._cache_key(file_path)}.json"
+        except OSError as e:
+            logger.warning("Could not hash audio file for transcript cache", file_path=file_path, error=str(e))
+            return self._inner.extract_audio(file_path)
+        
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+            logger.info("Transcript cache hit", file_path=file_path)
+            return result
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable transcript cache entry", path=str(cache_path), error=str(e))
+        
+        result = self._inner.extract_audio(file_path)
+        if result.get('success'):
+            self._store(cache_path, result)
+        return result
+    
+    def _store(self, cache_path: Path, result: Dict[str, Any]) -> None:
+        """Write a result atomically so readers never see a partial file."""
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(result, ensure_ascii=False))
+            os.replace(tmp_path, cache_path)
+            logger.debug("Transcript cached", path=str(cache_path))
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning("Failed to write transcript cache entry", path=str(cache_path), error=str(e))
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
@@ -0,0 +1,83 @@
+"""
+Bake reference embeddings for the HuggingFace embedding test probes
+
+Run once per model change; test_huggingface_embedding.py compares freshly
+generated embeddings against the baked vectors.
+
+Usage:
+    python tests/bake_test_embeddings.py [--model MODEL_NAME]
+"""
+import os
+import sys
+import argparse
+from typing import Dict, Optional
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+
+# Probe texts shared with test_huggingface_embedding.py
+PROBE_TEXTS = [
+    "This is a test document for embedding generation.",
+    "Golden Retriever puppies playing in a garden.",
+    "Image of Golden Retriever puppies with detailed labels and metadata."
+]
+
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hf_probe_embeddings.npz')
+
+
+def load_fixtures(model_name: str, path: str = FIXTURE_PATH) -> Optional[Dict[str, np.ndarray]]:
+    """
+    Load baked probe embeddings.
+    
+    Args:
+        model_name: Model the embeddings must have been generated with
+        path: Path to the .npz fixture file
+    
+    Returns:
+        Map of probe text -> float32 embedding, or None if the file is
+        missing or was baked with a different model
+    """
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        if str(data['model']) != model_name:
+            return None
+        return {
+            str(text): embedding.astype(np.float32)
+            for text, embedding in zip(data['texts'], data['embeddings'])
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bake reference embeddings for the HuggingFace test probes")
+    parser.add_argument('--model', default=Config.HUGGINGFACE_MODEL, help="Sentence Transformer model name")
+    parser.add_argument('--output', default=FIXTURE_PATH, help="Output .npz path")
+    args = parser.parse_args()
+    
+    from utils.embedding_providers import HuggingFaceEmbeddingProvider
+    
+    # Reference vectors are always baked at full precision
+    provider = HuggingFaceEmbeddingProvider(model_name=args.model, compile_model=False, dtype='fp32')
+    if not provider.model:
+        print("[ERROR] Model not loaded")
+        sys.exit(1)
+    
+    embeddings = provider.generate_embeddings(PROBE_TEXTS)
+    if any(embedding is None for embedding in embeddings):
+        print("[ERROR] Failed to generate embeddings")
+        sys.exit(1)
+    
+    np.savez(
+        args.output,
+        model=np.array(args.model),
+        texts=np.array(PROBE_TEXTS),
+        embeddings=np.stack(embeddings).astype(np.float16)
+    )
+    print(f"[OK] Baked {len(PROBE_TEXTS)} embeddings ({args.model}) to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
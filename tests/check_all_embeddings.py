@@ -22,57 +22,40 @@ def check_all_embeddings():
         conn = psycopg2.connect(Config.SUPABASE_DB_URL)
         cursor = conn.cursor()
         
-        # Get all records
+        # Totals and per-modality coverage, aggregated in the database
         cursor.execute("""
             SELECT 
-                file_id,
-                file_name,
-                file_path,
-                modality,
-                category,
-                CASE 
-                    WHEN embedding IS NULL THEN 'NO'
-                    ELSE 'YES'
-                END as has_embedding,
-                CASE 
-                    WHEN embedding IS NOT NULL THEN 1536
-                    ELSE NULL
-                END as embedding_dimensions,
-                quality_score,
-                created_at
+                COALESCE(modality, 'unknown') AS modality,
+                count(*) AS total,
+                count(embedding) AS with_embedding
             FROM data_labeling_embeddings
-            ORDER BY created_at DESC
+            GROUP BY COALESCE(modality, 'unknown')
+            ORDER BY max(created_at) DESC
         """)
+        modalities = {
+            modality: {'total': total, 'with_embedding': with_embedding}
+            for modality, total, with_embedding in cursor.fetchall()
+        }
         
-        records = cursor.fetchall()
+        total_records = sum(stats['total'] for stats in modalities.values())
         
-        if not records:
+        if not total_records:
             print("\n[INFO] No records found in database")
             return
         
-        print(f"\n[OK] Found {len(records)} total records in database\n")
+        print(f"\n[OK] Found {total_records} total records in database\n")
         
         # Count statistics
-        with_embeddings = sum(1 for r in records if r[5] == 'YES')
-        without_embeddings = len(records) - with_embeddings
+        with_embeddings = sum(stats['with_embedding'] for stats in modalities.values())
+        without_embeddings = total_records - with_embeddings
         
         print("=" * 60)
         print("Database Statistics")
         print("=" * 60)
-        print(f"Total Records: {len(records)}")
+        print(f"Total Records: {total_records}")
         print(f"Records WITH Embeddings: {with_embeddings}")
         print(f"Records WITHOUT Embeddings: {without_embeddings}")
-        print(f"Embedding Coverage: {(with_embeddings/len(records)*100):.1f}%")
-        
-        # Group by modality
-        modalities = {}
-        for record in records:
-            modality = record[3] or 'unknown'
-            if modality not in modalities:
-                modalities[modality] = {'total': 0, 'with_embedding': 0}
-            modalities[modality]['total'] += 1
-            if record[5] == 'YES':
-                modalities[modality]['with_embedding'] += 1
+        print(f"Embedding Coverage: {(with_embeddings/total_records*100):.1f}%")
         
         print("\n" + "=" * 60)
         print("By Modality")
@@ -81,18 +64,39 @@ def check_all_embeddings():
             coverage = (stats['with_embedding']/stats['total']*100) if stats['total'] > 0 else 0
             print(f"{modality}: {stats['with_embedding']}/{stats['total']} with embeddings ({coverage:.1f}%)")
         
+        # Stream records with a server-side (named) cursor instead of fetchall()
+        record_cursor = conn.cursor(name='embed_scan')
+        record_cursor.itersize = 2000
+        record_cursor.execute("""
+            SELECT 
+                file_id,
+                file_name,
+                file_path,
+                modality,
+                category,
+                (embedding IS NOT NULL) AS has_embedding,
+                vector_dims(embedding) AS embedding_dimensions,
+                quality_score,
+                created_at
+            FROM data_labeling_embeddings
+            ORDER BY created_at DESC
+        """)
+        
         # Show detailed records
         print("\n" + "=" * 60)
         print("Detailed Records")
         print("=" * 60)
         
-        for i, record in enumerate(records, 1):
+        upload_records = []
+        for i, record in enumerate(record_cursor, 1):
             file_id, file_name, file_path, modality, category, has_embedding, dims, quality, created = record
             
             # Check if from uploads folder
-            is_upload = file_path and 'upload' in file_path.lower() if file_path else False
+            is_upload = bool(file_path) and 'upload' in file_path.lower()
+            if is_upload:
+                upload_records.append(record)
             
-            status_icon = "[HAS]" if has_embedding == 'YES' else "[NO]"
+            status_icon = "[HAS]" if has_embedding else "[NO]"
             
             print(f"\n[{i}] {status_icon} {file_name}")
             print(f"    File ID: {file_id}")
@@ -100,7 +104,7 @@ def check_all_embeddings():
                 print(f"    Path: {file_path}")
             print(f"    Modality: {modality or 'N/A'}")
             print(f"    Category: {category or 'N/A'}")
-            print(f"    Embedding: {has_embedding}")
+            print(f"    Embedding: {'YES' if has_embedding else 'NO'}")
             if dims:
                 print(f"    Dimensions: {dims}")
             if quality:
@@ -109,8 +113,7 @@ def check_all_embeddings():
             if is_upload:
                 print(f"    [UPLOAD_FOLDER]")
         
-        # Filter uploads folder records
-        upload_records = [r for r in records if r[2] and 'upload' in r[2].lower()]
+        record_cursor.close()
         
         if upload_records:
             print("\n" + "=" * 60)
@@ -118,7 +121,7 @@ def check_all_embeddings():
             print("=" * 60)
             print(f"Total: {len(upload_records)}")
             
-            upload_with_embeddings = sum(1 for r in upload_records if r[5] == 'YES')
+            upload_with_embeddings = sum(1 for r in upload_records if r[5])
             upload_without_embeddings = len(upload_records) - upload_with_embeddings
             
             print(f"With Embeddings: {upload_with_embeddings}")
@@ -127,9 +130,9 @@ def check_all_embeddings():
             print("\nDetails:")
             for record in upload_records:
                 file_id, file_name, file_path, modality, category, has_embedding, dims, quality, created = record
-                status = "[HAS EMBEDDING]" if has_embedding == 'YES' else "[NO EMBEDDING]"
+                status = "[HAS EMBEDDING]" if has_embedding else "[NO EMBEDDING]"
                 print(f"  - {file_name}: {status}")
-                if has_embedding == 'YES' and dims:
+                if has_embedding and dims:
                     print(f"    Dimensions: {dims}")
         else:
             print("\n[INFO] No records found from UPLOAD_FOLDER")
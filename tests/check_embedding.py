@@ -3,16 +3,51 @@ Script to check if embeddings were actually generated and stored
 """
 import os
 import sys
+import importlib.util
+from typing import Optional, Sequence, Union
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from utils.database import EmbeddingDatabase
+from utils.logger import get_system_logger
 from config import Config
-import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
+import numpy as np
 
-def check_embedding(file_id: str = '310000688522'):
-    """Check if embedding exists for a file."""
+logger = get_system_logger()
+
+# Connections shared by the raw queries and EmbeddingDatabase, opened on first use
+_POOL: Optional[ThreadedConnectionPool] = None
+
+
+def _get_pool() -> ThreadedConnectionPool:
+    """Get the shared connection pool, creating it on first use."""
+    global _POOL
+    if _POOL is None:
+        _POOL = ThreadedConnectionPool(1, 8, Config.SUPABASE_DB_URL)
+    return _POOL
+
+
+def _format_values(values) -> str:
+    """Format embedding values compactly (4 decimal places)."""
+    return np.array2string(np.asarray(values, dtype=np.float32), precision=4, separator=', ', suppress_small=True)
+
+
+def check_embedding(file_ids: Union[str, Sequence[str]] = '310000688522'):
+    """
+    Check if embeddings exist for one or more files.
+    
+    All files are looked up together, so checking N files costs the same
+    number of database round trips as checking one.
+    
+    Args:
+        file_ids: File ID or sequence of file IDs to check
+    """
+    if isinstance(file_ids, str):
+        file_ids = [file_ids]
+    file_ids = list(dict.fromkeys(file_ids))
+    
     print("=" * 60)
     print("Checking Embedding Status")
     print("=" * 60)
@@ -23,162 +58,206 @@ def check_embedding(file_id: str = '310000688522'):
     
     if not embedding_key:
         print("[WARNING] No OpenAI API key found")
-        print("          Set OPENAI_DIRECT_API_KEY to generate embeddings")
+        print("          Set OPENAI_DIRECT_API_KEY to generate OpenAI embeddings")
     elif embedding_key.startswith('sk-or-'):
         print("[WARNING] Only OpenRouter key found (sk-or-...)")
-        print("          Embeddings require a direct OpenAI key (sk-...)")
+        print("          OpenAI embeddings require a direct OpenAI key (sk-...)")
         print("          Set OPENAI_DIRECT_API_KEY with a direct OpenAI key")
     else:
         print(f"[OK] Direct OpenAI key found (starts with: {embedding_key[:7]}...)")
         print("      Embeddings can be generated")
     
+    # HuggingFace embeddings need no key; without any usable provider the
+    # database round trips are skipped entirely
+    if not _embedding_provider_configured(embedding_key):
+        print(f"\n[2/3] Skipping database checks (no '{Config.EMBEDDING_PROVIDER}' embedding provider configured)")
+        _print_summary(generated_all=False, missing=file_ids, skipped=True)
+        return True
+    
     # Connect to database and check directly
     print("\n[2/3] Checking Database Record...")
     try:
-        conn = psycopg2.connect(Config.SUPABASE_DB_URL)
+        pool = _get_pool()
+        conn = pool.getconn()
+    except Exception as e:
+        print(f"[ERROR] Database connection failed: {str(e)}")
+        return False
+    
+    try:
         cursor = conn.cursor()
         
-        # Query the record
+        # Fetch the records, their sample values and the recent-records fallback
+        # in a single round trip; the fallback is empty when every record exists
         cursor.execute("""
+            WITH rec AS (
+                SELECT 
+                    file_id,
+                    file_name,
+                    modality,
+                    category,
+                    CASE 
+                        WHEN embedding IS NULL THEN 'NULL'
+                        ELSE 'EXISTS'
+                    END as embedding_status,
+                    pg_typeof(embedding)::text as embedding_type,
+                    vector_dims(embedding) as embedding_dimensions,
+                    subvector(embedding, 1, 5)::real[] as sample_values,
+                    quality_score,
+                    created_at
+                FROM data_labeling_embeddings
+                WHERE file_id = ANY(%(file_ids)s)
+            ),
+            recent AS (
+                -- Only needed (and only computed) when a record is missing
+                SELECT file_id, file_name, 
+                       CASE WHEN embedding IS NULL THEN 'NO' ELSE 'YES' END as has_embedding,
+                       created_at
+                FROM data_labeling_embeddings
+                WHERE (SELECT count(*) FROM rec) < %(num_ids)s
+                ORDER BY created_at DESC
+                LIMIT 10
+            )
             SELECT 
-                file_id,
-                file_name,
-                modality,
-                category,
-                CASE 
-                    WHEN embedding IS NULL THEN 'NULL'
-                    ELSE 'EXISTS'
-                END as embedding_status,
-                pg_typeof(embedding) as embedding_type,
-                CASE 
-                    WHEN embedding IS NOT NULL THEN (SELECT array_length(string_to_array(embedding::text, ','), 1))
-                    ELSE NULL
-                END as embedding_dimensions,
-                quality_score,
-                created_at
-            FROM data_labeling_embeddings
-            WHERE file_id = %s
-        """, (file_id,))
+                (SELECT json_agg(rec) FROM rec),
+                (SELECT json_agg(recent ORDER BY created_at DESC) FROM recent)
+        """, {'file_ids': file_ids, 'num_ids': len(file_ids)})
         
-        result = cursor.fetchone()
+        found, records = cursor.fetchone()
+        results = {rec['file_id']: rec for rec in found or ()}
         
-        if result:
+        for file_id in file_ids:
+            result = results.get(file_id)
+            if not result:
+                print(f"[ERROR] No record found for file_id: {file_id}")
+                continue
+            
             print(f"[OK] Record found for file_id: {file_id}")
             print(f"\nRecord Details:")
-            print(f"  - File Name: {result[1]}")
-            print(f"  - Modality: {result[2]}")
-            print(f"  - Category: {result[3]}")
-            print(f"  - Embedding Status: {result[4]}")
-            print(f"  - Embedding Type: {result[5]}")
-            print(f"  - Embedding Dimensions: {result[6] if result[6] else 'N/A'}")
-            print(f"  - Quality Score: {result[7]}")
-            print(f"  - Created At: {result[8]}")
+            print(f"  - File Name: {result['file_name']}")
+            print(f"  - Modality: {result['modality']}")
+            print(f"  - Category: {result['category']}")
+            print(f"  - Embedding Status: {result['embedding_status']}")
+            print(f"  - Embedding Type: {result['embedding_type']}")
+            print(f"  - Embedding Dimensions: {result['embedding_dimensions'] or 'N/A'}")
+            print(f"  - Quality Score: {result['quality_score']}")
+            print(f"  - Created At: {result['created_at']}")
             
-            if result[4] == 'EXISTS' and result[6]:
+            if result['embedding_status'] == 'EXISTS' and result['embedding_dimensions']:
                 print(f"\n[SUCCESS] Embedding EXISTS!")
-                print(f"  - Dimensions: {result[6]}")
-                print(f"  - Type: {result[5]}")
-                
-                # Get a sample of the embedding values
-                try:
-                    cursor.execute("""
-                        SELECT 
-                            (embedding::text::float[])[1:5] as sample_values
-                        FROM data_labeling_embeddings
-                        WHERE file_id = %s AND embedding IS NOT NULL
-                    """, (file_id,))
-                    sample = cursor.fetchone()
-                    if sample and sample[0]:
-                        print(f"  - First 5 values: {sample[0]}")
-                except Exception as e:
-                    print(f"  - Could not extract sample values: {str(e)}")
-            elif result[4] == 'NULL':
+                print(f"  - Dimensions: {result['embedding_dimensions']}")
+                print(f"  - Type: {result['embedding_type']}")
+                if result['sample_values']:
+                    print(f"  - First 5 values: {_format_values(result['sample_values'])}")
+            elif result['embedding_status'] == 'NULL':
                 print(f"\n[INFO] Embedding is NULL (not generated)")
                 print("       This is expected if OPENAI_DIRECT_API_KEY is not set")
             else:
-                print(f"\n[INFO] Embedding status: {result[4]}")
-        else:
-            print(f"[ERROR] No record found for file_id: {file_id}")
+                print(f"\n[INFO] Embedding status: {result['embedding_status']}")
+        
+        if len(results) < len(file_ids):
             print("\nChecking all records in database...")
-            cursor.execute("""
-                SELECT file_id, file_name, 
-                       CASE WHEN embedding IS NULL THEN 'NO' ELSE 'YES' END as has_embedding
-                FROM data_labeling_embeddings
-                ORDER BY created_at DESC
-                LIMIT 10
-            """)
-            records = cursor.fetchall()
             if records:
                 print(f"\nFound {len(records)} recent records:")
                 for rec in records:
-                    print(f"  - {rec[0]}: {rec[1]} - Embedding: {rec[2]}")
+                    print(f"  - {rec['file_id']}: {rec['file_name']} - Embedding: {rec['has_embedding']}")
             else:
                 print("  No records found in database")
         
         cursor.close()
-        conn.close()
         
     except Exception as e:
         print(f"[ERROR] Database query failed: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Embedding check query failed", file_ids=file_ids)
         return False
+    finally:
+        conn.rollback()
+        pool.putconn(conn)
     
     # Check using the database module
     print("\n[3/3] Checking via Database Module...")
     try:
         db = EmbeddingDatabase(
             connection_string=Config.SUPABASE_DB_URL,
-            openai_api_key=embedding_key
+            openai_api_key=embedding_key,
+            pool=pool
         )
         
-        record = db.get_by_file_id(file_id)
-        if record:
-            print(f"[OK] Record retrieved via module")
-            if record.get('embedding'):
-                print(f"[SUCCESS] Embedding found in record!")
-                print(f"  - Type: {type(record['embedding'])}")
-                if isinstance(record['embedding'], list):
-                    print(f"  - Dimensions: {len(record['embedding'])}")
-                    print(f"  - First 5 values: {record['embedding'][:5]}")
+        # Only the first few values are needed, so don't fetch the full vectors
+        previews = db.get_previews_by_file_ids(file_ids, n=5)
+        for file_id in file_ids:
+            record = previews.get(file_id)
+            if record:
+                print(f"[OK] Record retrieved via module: {file_id}")
+                if record['embedding_preview'] is not None:
+                    print(f"[SUCCESS] Embedding found in record!")
+                    print(f"  - Dimensions: {record['embedding_dimensions']}")
+                    print(f"  - First 5 values: {_format_values(record['embedding_preview'])}")
+                else:
+                    print(f"[INFO] No embedding in record (field is None or missing)")
             else:
-                print(f"[INFO] No embedding in record (field is None or missing)")
-        else:
-            print(f"[ERROR] Record not found via module")
+                print(f"[ERROR] Record not found via module: {file_id}")
         
         db.close()
         
     except Exception as e:
         print(f"[ERROR] Module check failed: {str(e)}")
     
+    missing = [
+        file_id for file_id in file_ids
+        if results.get(file_id, {}).get('embedding_status') != 'EXISTS'
+    ]
+    _print_summary(generated_all=not missing, missing=missing)
+    
+    return True
+
+
+def _embedding_provider_configured(embedding_key: Optional[str]) -> bool:
+    """
+    Check from configuration alone whether Config.EMBEDDING_PROVIDER can embed.
+    
+    No provider is built, so the HuggingFace model is never loaded just to decide.
+    """
+    has_openai = bool(embedding_key) and not embedding_key.startswith('sk-or-')
+    has_huggingface = importlib.util.find_spec('sentence_transformers') is not None
+    if Config.EMBEDDING_PROVIDER == 'openai':
+        return has_openai
+    if Config.EMBEDDING_PROVIDER == 'huggingface':
+        return has_huggingface
+    return has_huggingface or has_openai
+
+
+def _print_summary(generated_all: bool, missing: Sequence[str], skipped: bool = False):
+    """Print the final embedding summary and how to enable embeddings."""
     print("\n" + "=" * 60)
     print("Summary")
     print("=" * 60)
     
-    if result and result[4] == 'EXISTS':
+    if generated_all:
         print("[SUCCESS] Embedding was generated and stored!")
     else:
-        print("[INFO] Embedding was NOT generated")
+        if skipped:
+            print(f"[INFO] Database check skipped for: {', '.join(missing)}")
+            print("       (no embedding provider configured here; records may still exist)")
+        else:
+            print(f"[INFO] Embedding was NOT generated for: {', '.join(missing)}")
         print("\nTo enable embeddings:")
-        print("1. Set OPENAI_DIRECT_API_KEY environment variable")
-        print("2. Use a direct OpenAI key (not OpenRouter)")
+        print("1. Install sentence-transformers (EMBEDDING_PROVIDER=auto or huggingface), or")
+        print("2. Set OPENAI_DIRECT_API_KEY to a direct OpenAI key (not OpenRouter)")
         print("3. Re-process the image or any new images")
-    
-    return True
 
 
 if __name__ == '__main__':
     import argparse
     
-    parser = argparse.ArgumentParser(description='Check if embedding exists for a file')
+    parser = argparse.ArgumentParser(description='Check if embeddings exist for one or more files')
     parser.add_argument(
-        'file_id',
-        nargs='?',
-        default='310000688522',
-        help='File ID to check'
+        'file_ids',
+        nargs='*',
+        default=['310000688522'],
+        help='File ID(s) to check'
     )
     
     args = parser.parse_args()
     
-    check_embedding(args.file_id)
+    check_embedding(args.file_ids)
 
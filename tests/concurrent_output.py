@@ -0,0 +1,58 @@
+"""
+Run test sections concurrently with each section's output captured separately
+
+Shared by test scripts that overlap slow sections (network round trips, model
+inference) but want to print each section's report in order.
+"""
+import io
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Sequence, Tuple
+
+
+class _ThreadLocalStream(io.TextIOBase):
+    """Stream proxy that sends each thread's writes to its own buffer, if set."""
+    
+    def __init__(self, default, local: threading.local):
+        self.default = default
+        self.local = local
+    
+    def write(self, text):
+        return getattr(self.local, 'buffer', self.default).write(text)
+    
+    def flush(self):
+        getattr(self.local, 'buffer', self.default).flush()
+
+
+def run_captured_concurrently(sections: Sequence[Callable[[], Any]]) -> List[Tuple[Any, str]]:
+    """
+    Run sections on a thread pool, capturing each one's stdout and stderr.
+    
+    Both streams go to the same per-section buffer, so tracebacks stay next
+    to the output they belong to. Sections should handle their own
+    exceptions; an uncaught one is re-raised once all sections have finished.
+    
+    Args:
+        sections: Callables taking no arguments
+    
+    Returns:
+        List of (return value, captured output), in the order of sections
+    """
+    local = threading.local()
+    
+    def run(section):
+        local.buffer = io.StringIO()
+        try:
+            return section(), local.buffer.getvalue()
+        finally:
+            del local.buffer
+    
+    stdout, stderr = sys.stdout, sys.stderr
+    sys.stdout = _ThreadLocalStream(stdout, local)
+    sys.stderr = _ThreadLocalStream(stderr, local)
+    try:
+        with ThreadPoolExecutor(max_workers=max(len(sections), 1)) as executor:
+            return list(executor.map(run, sections))
+    finally:
+        sys.stdout, sys.stderr = stdout, stderr
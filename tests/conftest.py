@@ -0,0 +1,20 @@
+"""
+Shared pytest fixtures
+"""
+import pytest
+
+# File name -> contents of the read-only files used by the cache tests
+CACHE_FIXTURE_FILES = {
+    'result.txt': b"This is a test file for caching",
+    'integration.txt': b"Test content for caching integration",
+    'different.txt': b"Different content",
+}
+
+
+@pytest.fixture(scope='session')
+def fixtures_dir(tmp_path_factory):
+    """Directory of fixture files, written once per test session."""
+    directory = tmp_path_factory.mktemp('cache_fixtures')
+    for name, content in CACHE_FIXTURE_FILES.items():
+        (directory / name).write_bytes(content)
+    return directory
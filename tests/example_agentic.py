@@ -1,7 +1,7 @@
 """
 Example: Using the True Agentic System
 """
-from orchestrator_agentic import AgenticOrchestrator
+from orchestrator_agentic import get_agentic_orchestrator
 from config import Config
 
 def main():
@@ -13,7 +13,7 @@ def main():
     
     # Initialize the agentic orchestrator
     print("\n1. Initializing agentic system...")
-    orchestrator = AgenticOrchestrator(
+    orchestrator = get_agentic_orchestrator(
         deepseek_api_key=Config.DEEPSEEK_API_KEY,
         openai_api_key=Config.OPENAI_API_KEY
     )
@@ -1,7 +1,7 @@
 """
 Quick test to verify the agentic system is working
 """
-from orchestrator_agentic import AgenticOrchestrator
+from orchestrator_agentic import get_agentic_orchestrator
 from config import Config
 import os
 
@@ -14,7 +14,7 @@ def test_agentic_system():
     
     # Initialize
     print("\n1. Initializing agentic orchestrator...")
-    orchestrator = AgenticOrchestrator(
+    orchestrator = get_agentic_orchestrator(
         deepseek_api_key=Config.DEEPSEEK_API_KEY,
         openai_api_key=Config.OPENAI_API_KEY
     )
@@ -35,11 +35,7 @@ def test_agentic_system():
         'test_data/sample_image.png'
     ]
     
-    test_file = None
-    for f in test_files:
-        if os.path.exists(f):
-            test_file = f
-            break
+    test_file = next((f for f in test_files if os.path.exists(f)), None)
     
     if test_file:
         print(f"\n3. Testing with file: {test_file}")
@@ -2,21 +2,91 @@
 Test script to verify API keys and model functionality
 """
 import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from config import Config
 from openai import OpenAI
 import sys
 
+BAR = "=" * 60
+
 def print_section(title):
     """Print a formatted section header."""
-    print("\n" + "=" * 60)
-    print(f"  {title}")
-    print("=" * 60)
+    print(f"\n{BAR}\n  {title}\n{BAR}")
 
 # Use ASCII-safe characters for Windows console
 CHECK = "[OK]"
 CROSS = "[X]"
 WARN = "[!]"
 
+# Simple test image (1x1 pixel PNG), minimal valid PNG in base64
+TEST_PNG_B64 = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
+TEST_PNG_DATA_URL = f"data:image/png;base64,{TEST_PNG_B64}"
+
+@lru_cache(maxsize=4)
+def get_client(api_key, base_url=None):
+    """Get a shared OpenAI client so tests reuse its HTTP connection pool."""
+    return OpenAI(api_key=api_key, base_url=base_url)
+
+def check_category(client):
+    """GPT-4o-mini for text (Category Classification)."""
+    response = client.chat.completions.create(
+        model=Config.get_model_name("gpt-4o-mini"),
+        messages=[
+            {"role": "system", "content": "You are a content categorization expert."},
+            {"role": "user", "content": "Classify this: A technical report about AI"}
+        ],
+        max_tokens=50,
+        temperature=0.3
+    )
+    return response.choices[0].message.content
+
+def check_json(client):
+    """GPT-4o-mini for JSON (Label Generation)."""
+    response = client.chat.completions.create(
+        model=Config.get_model_name("gpt-4o-mini"),
+        messages=[
+            {"role": "system", "content": "You are a label extraction expert. You must return valid JSON format."},
+            {"role": "user", "content": "Extract labels from: 'Machine learning research paper about neural networks'. Return the result as JSON."}
+        ],
+        response_format={"type": "json_object"},
+        max_tokens=200,
+        temperature=0.3
+    )
+    return response.choices[0].message.content
+
+def check_vision(client):
+    """GPT-4o-mini Vision (Image Analysis)."""
+    response = client.chat.completions.create(
+        model=Config.get_model_name("gpt-4o-mini"),
+        messages=[
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": "Describe this image briefly."
+                    },
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": TEST_PNG_DATA_URL
+                        }
+                    }
+                ]
+            }
+        ],
+        max_tokens=100
+    )
+    return response.choices[0].message.content
+
+# (name, header, check) for the OpenAI model checks, in report order
+OPENAI_CHECKS = (
+    ("gpt-4o-mini", "[Test 1] Testing gpt-4o-mini (Category Classification)...", check_category),
+    ("gpt-4o-mini JSON", "[Test 2] Testing gpt-4o-mini with JSON format (Label Generation)...", check_json),
+    ("gpt-4o-mini Vision", "[Test 3] Testing gpt-4o-mini Vision (Image Analysis)...", check_vision),
+)
+
 def test_openai_key():
     """Test OpenAI API key and models."""
     print_section("Testing OpenAI API Key")
@@ -34,84 +104,30 @@ def test_openai_key():
     if use_openrouter:
         print(f"{WARN}  Using OpenRouter API")
         base_url = Config.get_base_url()
-        client = OpenAI(api_key=api_key, base_url=base_url)
+        client = get_client(api_key, base_url)
     else:
         print(f"{WARN}  Using OpenAI API directly")
-        client = OpenAI(api_key=api_key)
+        client = get_client(api_key)
     
     try:
         
-        # Test 1: GPT-4o-mini for text (Category Classification)
-        print("\n[Test 1] Testing gpt-4o-mini (Category Classification)...")
-        try:
-            response = client.chat.completions.create(
-                model=Config.get_model_name("gpt-4o-mini"),
-                messages=[
-                    {"role": "system", "content": "You are a content categorization expert."},
-                    {"role": "user", "content": "Classify this: A technical report about AI"}
-                ],
-                max_tokens=50,
-                temperature=0.3
-            )
-            result = response.choices[0].message.content
-            print(f"   {CHECK} gpt-4o-mini works! Response: {result[:50]}...")
-        except Exception as e:
-            print(f"   {CROSS} gpt-4o-mini failed: {str(e)}")
-            return False
+        # Tests 1-3 are independent API calls; run them concurrently and
+        # report the results in order
+        with ThreadPoolExecutor(max_workers=len(OPENAI_CHECKS)) as executor:
+            futures = [executor.submit(check, client) for _, _, check in OPENAI_CHECKS]
         
-        # Test 2: GPT-4o-mini for JSON (Label Generation)
-        print("\n[Test 2] Testing gpt-4o-mini with JSON format (Label Generation)...")
-        try:
-            response = client.chat.completions.create(
-                model=Config.get_model_name("gpt-4o-mini"),
-                messages=[
-                    {"role": "system", "content": "You are a label extraction expert. You must return valid JSON format."},
-                    {"role": "user", "content": "Extract labels from: 'Machine learning research paper about neural networks'. Return the result as JSON."}
-                ],
-                response_format={"type": "json_object"},
-                max_tokens=200,
-                temperature=0.3
-            )
-            result = response.choices[0].message.content
-            print(f"   {CHECK} gpt-4o-mini JSON works! Response: {result[:50]}...")
-        except Exception as e:
-            print(f"   {CROSS} gpt-4o-mini JSON failed: {str(e)}")
-            return False
+        all_ok = True
+        for (name, header, _), future in zip(OPENAI_CHECKS, futures):
+            print(f"\n{header}")
+            try:
+                result = future.result()
+                print(f"   {CHECK} {name} works! Response: {result[:50]}...")
+            except Exception as e:
+                print(f"   {CROSS} {name} failed: {str(e)}")
+                print(f"   Error details: {type(e).__name__}")
+                all_ok = False
         
-        # Test 3: GPT-4o-mini Vision (Image Analysis)
-        print("\n[Test 3] Testing gpt-4o-mini Vision (Image Analysis)...")
-        try:
-            # Create a simple test image (1x1 pixel PNG)
-            import base64
-            # Minimal valid PNG in base64
-            test_image_b64 = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
-            
-            response = client.chat.completions.create(
-                model=Config.get_model_name("gpt-4o-mini"),
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": "Describe this image briefly."
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/png;base64,{test_image_b64}"
-                                }
-                            }
-                        ]
-                    }
-                ],
-                max_tokens=100
-            )
-            result = response.choices[0].message.content
-            print(f"   {CHECK} gpt-4o-mini Vision works! Response: {result[:50]}...")
-        except Exception as e:
-            print(f"   {CROSS} gpt-4o-mini Vision failed: {str(e)}")
-            print(f"   Error details: {type(e).__name__}")
+        if not all_ok:
             return False
         
         # Test 4: Whisper-1 (Audio Transcription)
@@ -210,9 +226,7 @@ def test_models_summary():
 
 def main():
     """Run all tests."""
-    print("\n" + "=" * 60)
-    print("  API TESTING SUITE")
-    print("=" * 60)
+    print_section("API TESTING SUITE")
     
     # Test configuration
     config_ok = test_config()
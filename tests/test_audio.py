@@ -4,20 +4,59 @@ Test script to diagnose audio transcription issues
 import os
 import sys
 import base64
+from functools import lru_cache
 from config import Config
 from openai import OpenAI
 from agents.content_extractor_agent import ContentExtractorAgent
 
+BAR = "=" * 60
+
 def print_section(title):
     """Print a formatted section header."""
-    print("\n" + "=" * 60)
-    print(f"  {title}")
-    print("=" * 60)
+    print(f"\n{BAR}\n  {title}\n{BAR}")
 
 CHECK = "[OK]"
 CROSS = "[X]"
 WARN = "[!]"
 
+# MIME type per supported audio/video extension; also the uploads/ filter
+MIME_TYPES = {
+    '.mp3': 'audio/mpeg',
+    '.wav': 'audio/wav',
+    '.flac': 'audio/flac',
+    '.m4a': 'audio/mp4',
+    '.aac': 'audio/aac',
+    '.ogg': 'audio/ogg',
+    '.mp4': 'video/mp4',
+    '.avi': 'video/x-msvideo',
+    '.mov': 'video/quicktime',
+    '.mkv': 'video/x-matroska'
+}
+AUDIO_EXTENSIONS = frozenset(MIME_TYPES)
+
+@lru_cache(maxsize=1)
+def _list_audio_files(uploads_dir="uploads"):
+    """List (path, extension) for audio/video files in uploads (scanned once per run)."""
+    if not os.path.isdir(uploads_dir):
+        return ()
+    with os.scandir(uploads_dir) as entries:
+        files = ((entry.path, os.path.splitext(entry.name)[1].lower()) for entry in entries)
+        return tuple((path, ext) for path, ext in files if ext in AUDIO_EXTENSIONS)
+
+@lru_cache(maxsize=4)
+def get_client(api_key, base_url=None):
+    """Get a shared OpenAI client so tests reuse its HTTP connection pool."""
+    return OpenAI(api_key=api_key, base_url=base_url)
+
+def _read_b64(path):
+    """Base64-encode a file chunk by chunk without holding the raw bytes in memory."""
+    encoded = bytearray()
+    with open(path, 'rb') as f:
+        # Chunk size is a multiple of 3 so no padding appears mid-stream
+        for chunk in iter(lambda: f.read(3 << 20), b''):
+            encoded += base64.b64encode(chunk)
+    return encoded.decode('ascii')
+
 def test_audio_transcription_direct():
     """Test audio transcription using direct OpenAI Whisper API."""
     print_section("Testing Direct OpenAI Whisper API")
@@ -37,13 +76,7 @@ def test_audio_transcription_direct():
     print(f"{CHECK} OpenAI key found: {openai_key[:10]}...{openai_key[-4:]}")
     
     # Check if we have a test audio file
-    test_files = []
-    uploads_dir = "uploads"
-    if os.path.exists(uploads_dir):
-        for file in os.listdir(uploads_dir):
-            ext = os.path.splitext(file)[1].lower()
-            if ext in ['.mp3', '.wav', '.flac', '.m4a', '.aac', '.ogg', '.mp4', '.avi', '.mov', '.mkv']:
-                test_files.append(os.path.join(uploads_dir, file))
+    test_files = _list_audio_files()
     
     if not test_files:
         print(f"{WARN}  No audio files found in uploads/ directory")
@@ -53,7 +86,7 @@ def test_audio_transcription_direct():
     print(f"{CHECK} Found {len(test_files)} audio file(s)")
     
     # Test with first audio file
-    test_file = test_files[0]
+    test_file, _ = test_files[0]
     print(f"\n   Testing with: {os.path.basename(test_file)}")
     
     try:
@@ -92,48 +125,26 @@ def test_audio_with_openrouter():
     print(f"{CHECK} OpenRouter key found: {api_key[:10]}...{api_key[-4:]}")
     
     # Check if we have a test audio file
-    test_files = []
-    uploads_dir = "uploads"
-    if os.path.exists(uploads_dir):
-        for file in os.listdir(uploads_dir):
-            ext = os.path.splitext(file)[1].lower()
-            if ext in ['.mp3', '.wav', '.flac', '.m4a', '.aac', '.ogg', '.mp4', '.avi', '.mov', '.mkv']:
-                test_files.append(os.path.join(uploads_dir, file))
+    test_files = _list_audio_files()
     
     if not test_files:
         print(f"{WARN}  No audio files found in uploads/ directory")
         print("   Please add an audio file to test")
         return None
     
-    test_file = test_files[0]
+    test_file, ext = test_files[0]
     print(f"\n   Testing with: {os.path.basename(test_file)}")
     
     try:
-        # Read and encode audio file
-        with open(test_file, 'rb') as f:
-            audio_data = f.read()
-        
-        audio_b64 = base64.b64encode(audio_data).decode('utf-8')
+        # Read and encode audio file once; both attempts below reuse it
+        audio_b64 = _read_b64(test_file)
         
         # Determine MIME type
-        ext = os.path.splitext(test_file)[1].lower()
-        mime_types = {
-            '.mp3': 'audio/mpeg',
-            '.wav': 'audio/wav',
-            '.flac': 'audio/flac',
-            '.m4a': 'audio/mp4',
-            '.aac': 'audio/aac',
-            '.ogg': 'audio/ogg',
-            '.mp4': 'video/mp4',
-            '.avi': 'video/x-msvideo',
-            '.mov': 'video/quicktime',
-            '.mkv': 'video/x-matroska'
-        }
-        mime_type = mime_types.get(ext, 'audio/mpeg')
+        mime_type = MIME_TYPES.get(ext, 'audio/mpeg')
         
         # Try with openai/whisper-1 through OpenRouter chat completions
         base_url = Config.get_base_url()
-        client = OpenAI(api_key=api_key, base_url=base_url)
+        client = get_client(api_key, base_url)
         
         print(f"   Attempting transcription with openai/whisper-1 via OpenRouter...")
         
@@ -204,9 +215,7 @@ def test_audio_with_openrouter():
 
 def main():
     """Run audio transcription tests."""
-    print("\n" + "=" * 60)
-    print("  AUDIO TRANSCRIPTION DIAGNOSTIC TEST")
-    print("=" * 60)
+    print_section("AUDIO TRANSCRIPTION DIAGNOSTIC TEST")
     
     # Test 1: Direct OpenAI Whisper
     result1 = test_audio_transcription_direct()
@@ -2,9 +2,15 @@
 Test actual audio transcription with the content extractor agent
 """
 import os
+import re
 import sys
 from config import Config
 from agents.content_extractor_agent import ContentExtractorAgent
+from utils.transcript_cache import CachedExtractor, DEFAULT_CACHE_DIR
+
+_WORD_RE = re.compile(r'\S+')
+
+AUDIO_EXTENSIONS = frozenset({'.mp3', '.wav', '.flac', '.m4a', '.aac', '.ogg', '.mp4', '.avi', '.mov', '.mkv'})
 
 def main():
     print("\n" + "=" * 60)
@@ -14,20 +20,22 @@ def main():
     # Find audio file
     uploads_dir = "uploads"
     audio_file = None
+    audio_size = 0
     
-    if os.path.exists(uploads_dir):
-        for file in os.listdir(uploads_dir):
-            ext = os.path.splitext(file)[1].lower()
-            if ext in ['.mp3', '.wav', '.flac', '.m4a', '.aac', '.ogg', '.mp4', '.avi', '.mov', '.mkv']:
-                audio_file = os.path.join(uploads_dir, file)
-                break
+    if os.path.isdir(uploads_dir):
+        with os.scandir(uploads_dir) as entries:
+            for entry in entries:
+                if os.path.splitext(entry.name)[1].lower() in AUDIO_EXTENSIONS and entry.is_file():
+                    audio_file = entry.path
+                    audio_size = entry.stat().st_size
+                    break
     
     if not audio_file:
         print("[ERROR] No audio file found in uploads/ directory")
         sys.exit(1)
     
     print(f"\n[INFO] Testing with: {os.path.basename(audio_file)}")
-    print(f"[INFO] File size: {os.path.getsize(audio_file) / 1024:.2f} KB")
+    print(f"[INFO] File size: {audio_size / 1024:.2f} KB")
     
     # Initialize content extractor
     api_key = Config.OPENAI_API_KEY
@@ -38,7 +46,9 @@ def main():
     print(f"[INFO] Using API key: {api_key[:10]}...{api_key[-4:]}")
     print(f"[INFO] Using OpenRouter: {Config.USE_OPENROUTER}")
     
-    extractor = ContentExtractorAgent(openai_api_key=api_key)
+    # Reruns on the same file reuse the cached transcript
+    # (set DATA_LABELING_NO_TRANSCRIPT_CACHE=1 to force a fresh transcription)
+    extractor = CachedExtractor(ContentExtractorAgent(openai_api_key=api_key), DEFAULT_CACHE_DIR)
     
     print("\n[INFO] Starting transcription...")
     print("-" * 60)
@@ -55,7 +65,7 @@ def main():
             print(f"\n[SUCCESS] Transcription completed!")
             print(f"[INFO] Method: {result.get('extraction_method', 'unknown')}")
             print(f"[INFO] Length: {len(transcript)} characters")
-            print(f"[INFO] Word count: {len(transcript.split())} words")
+            print(f"[INFO] Word count: {sum(1 for _ in _WORD_RE.finditer(transcript))} words")
             print("\n" + "-" * 60)
             print("TRANSCRIPT:")
             print("-" * 60)
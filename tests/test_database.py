@@ -3,6 +3,12 @@ Test script for Supabase pgvector database setup
 """
 import os
 import sys
+import time
+import atexit
+import itertools
+import functools
+import threading
+import traceback
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -10,9 +16,37 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.database import EmbeddingDatabase
 from config import Config
 from utils.logger import get_system_logger
+from concurrent_output import run_captured_concurrently
 
 logger = get_system_logger()
 
+# One database shared by every test in this module
+_DB = None
+_DB_LOCK = threading.Lock()
+
+
+def get_db() -> EmbeddingDatabase:
+    """Return the shared EmbeddingDatabase, creating it on first use."""
+    global _DB
+    with _DB_LOCK:
+        if _DB is None:
+            _DB = EmbeddingDatabase(
+                connection_string=Config.SUPABASE_DB_URL,
+                openai_api_key=Config.OPENAI_API_KEY
+            )
+    return _DB
+
+
+_ID_COUNTER = itertools.count(1)
+
+
+def _test_id() -> str:
+    """Unique file ID for test records (pid + monotonic clock + counter)."""
+    return f"test_{os.getpid()}_{time.monotonic_ns()}_{next(_ID_COUNTER)}"
+
+
+atexit.register(lambda: _DB and _DB.close())
+
 
 def test_database_connection():
     """Test database connection."""
@@ -22,10 +56,7 @@ def test_database_connection():
     
     try:
         # Initialize database
-        db = EmbeddingDatabase(
-            connection_string=Config.SUPABASE_DB_URL,
-            openai_api_key=Config.OPENAI_API_KEY
-        )
+        db = get_db()
         print("[OK] Database connection pool created successfully")
         
         # Test connection by getting statistics
@@ -37,8 +68,6 @@ def test_database_connection():
         print(f"  - Average quality score: {avg_quality:.2f}" if avg_quality is not None else "  - Average quality score: N/A")
         print(f"  - Unique modalities: {stats.get('unique_modalities', 0) or 0}")
         print(f"  - Unique categories: {stats.get('unique_categories', 0) or 0}")
-        
-        db.close()
         return True
         
     except Exception as e:
@@ -73,24 +102,27 @@ def test_embedding_generation():
         return True  # This is expected, not a failure
     
     try:
-        db = EmbeddingDatabase(
-            connection_string=Config.SUPABASE_DB_URL,
-            openai_api_key=embedding_key
-        )
+        db = get_db()
         
-        test_text = "This is a test document for data labeling. It contains sample content."
-        embedding = db.generate_embedding(test_text)
+        test_texts = [
+            "This is a test document for data labeling. It contains sample content.",
+            "Invoice for consulting services rendered in March.",
+            "Audio transcript of a weekly team meeting.",
+            "Product photo of a red running shoe on a white background."
+        ]
+        # All texts are embedded in a single batched request
+        embeddings = db.generate_embeddings(test_texts)
         
-        if embedding:
-            print(f"[OK] Embedding generated successfully")
-            print(f"  - Text length: {len(test_text)} characters")
-            print(f"  - Embedding dimensions: {len(embedding)}")
-            print(f"  - First 5 values: {embedding[:5]}")
-            db.close()
+        if len(embeddings) == len(test_texts) and all(e is not None for e in embeddings):
+            dim = len(embeddings[0])
+            assert all(len(e) == dim for e in embeddings), "All embeddings should share one dimension"
+            print(f"[OK] Embeddings generated successfully")
+            print(f"  - Texts embedded in one batch: {len(test_texts)}")
+            print(f"  - Embedding dimensions: {dim}")
+            print(f"  - First 5 values: {embeddings[0][:5].tolist()}")
             return True
         else:
-            print("[ERROR] Failed to generate embedding")
-            db.close()
+            print("[ERROR] Failed to generate embeddings")
             return False
             
     except Exception as e:
@@ -116,10 +148,7 @@ def test_store_embedding():
         print("       (Data will be stored, but without vector embedding)")
     
     try:
-        db = EmbeddingDatabase(
-            connection_string=Config.SUPABASE_DB_URL,
-            openai_api_key=Config.OPENAI_API_KEY
-        )
+        db = get_db()
         
         # Create test output data
         test_output = {
@@ -138,7 +167,7 @@ def test_store_embedding():
             'agents_involved': ['content_extractor', 'supervisor']
         }
         
-        file_id = 'test_' + str(os.urandom(8).hex())
+        file_id = _test_id()
         success = db.store_embedding(
             file_id=file_id,
             file_name=test_output['file_name'],
@@ -155,18 +184,15 @@ def test_store_embedding():
                 print(f"[OK] Data retrieved successfully")
                 print(f"  - Retrieved file name: {retrieved['file_name']}")
                 print(f"  - Quality score: {retrieved['quality_score']}")
-                if retrieved.get('embedding'):
+                if retrieved.get('embedding') is not None:
                     print(f"  - Has embedding: Yes")
                 else:
                     print(f"  - Has embedding: No (set OPENAI_DIRECT_API_KEY to generate embeddings)")
             else:
                 print("[WARNING] Data stored but could not be retrieved")
-            
-            db.close()
             return True
         else:
             print("[ERROR] Failed to store data")
-            db.close()
             return False
             
     except Exception as e:
@@ -191,10 +217,7 @@ def test_similarity_search():
         return True
     
     try:
-        db = EmbeddingDatabase(
-            connection_string=Config.SUPABASE_DB_URL,
-            openai_api_key=Config.OPENAI_API_KEY
-        )
+        db = get_db()
         
         query_text = "document processing and text extraction"
         results = db.search_similar(query_text, limit=5, threshold=0.5)
@@ -209,8 +232,6 @@ def test_similarity_search():
             print(f"    - Similarity: {result.get('similarity', 0):.3f}")
             print(f"    - Modality: {result.get('modality', 'N/A')}")
             print(f"    - Category: {result.get('category', 'N/A')}")
-        
-        db.close()
         return True
         
     except Exception as e:
@@ -220,6 +241,16 @@ def test_similarity_search():
         return False
 
 
+def _run_test(test_name, test_fn):
+    """Run one test, reporting an uncaught exception as a failure; returns (name, passed)."""
+    try:
+        return test_name, test_fn()
+    except Exception as e:
+        print(f"[ERROR] {test_name} test failed: {str(e)}")
+        traceback.print_exc()
+        return test_name, False
+
+
 if __name__ == '__main__':
     print("\n")
     print("Supabase pgvector Database Test Suite")
@@ -231,13 +262,21 @@ if __name__ == '__main__':
     print("4. Verified the connection string is correct")
     print("\n")
     
-    results = []
+    tests = [
+        ("Database Connection", test_database_connection),
+        ("Embedding Generation", test_embedding_generation),
+        ("Store Embedding", test_store_embedding),
+        ("Similarity Search", test_similarity_search),
+    ]
+    
+    # The tests wait on network round trips; run them concurrently and print
+    # each one's captured output in order once they have all finished
+    outcomes = run_captured_concurrently([functools.partial(_run_test, *test) for test in tests])
     
-    # Run tests
-    results.append(("Database Connection", test_database_connection()))
-    results.append(("Embedding Generation", test_embedding_generation()))
-    results.append(("Store Embedding", test_store_embedding()))
-    results.append(("Similarity Search", test_similarity_search()))
+    results = []
+    for result, output in outcomes:
+        sys.stdout.write(output)
+        results.append(result)
     
     # Summary
     print("\n" + "=" * 60)
@@ -1,34 +1,43 @@
 """
 Test script to process an image and store it with embeddings
 """
-import os
 import sys
+from pathlib import Path
 
 # Add parent directory to path
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
-from orchestrator_agentic import AgenticOrchestrator
 from config import Config
-from utils.database import EmbeddingDatabase
 from utils.logger import get_system_logger
 
 logger = get_system_logger()
 
 
-def test_image_embedding(image_path: str):
-    """Process an image and store it with embeddings."""
+def test_image_embedding(image_path: str, embedding_only: bool = True):
+    """
+    Process an image and store it with embeddings.
+    
+    Args:
+        image_path: Path to image file to process
+        embedding_only: Skip LLM labeling and quality scoring; only extract,
+                        embed and store
+    """
     print("=" * 60)
     print("Testing Image Processing with Embedding Storage")
     print("=" * 60)
     
     # Check if image exists
-    if not os.path.exists(image_path):
+    image = Path(image_path)
+    if not image.exists():
         print(f"[ERROR] Image file not found: {image_path}")
         return False
     
-    print(f"\n[1/4] Processing image: {os.path.basename(image_path)}")
+    print(f"\n[1/4] Processing image: {image.name}")
     
     try:
+        # Imported here so --help doesn't load the agents and database drivers
+        from orchestrator_agentic import AgenticOrchestrator
+        
         # Initialize orchestrator
         orchestrator = AgenticOrchestrator(
             deepseek_api_key=Config.DEEPSEEK_API_KEY,
@@ -36,10 +45,11 @@ def test_image_embedding(image_path: str):
         )
         
         # Process the image
-        print("[2/4] Extracting content and generating labels...")
+        print("[2/4] Extracting content" + ("..." if embedding_only else " and generating labels..."))
         result = orchestrator.process_file(
             file_path=image_path,
-            output_dir='output'
+            output_dir='output',
+            embedding_only=embedding_only
         )
         
         if not result.get('success', False):
@@ -48,8 +58,9 @@ def test_image_embedding(image_path: str):
         
         print("[OK] Image processed successfully")
         print(f"  - Modality: {result.get('modality', 'N/A')}")
-        print(f"  - Category: {result.get('category', 'N/A')}")
-        print(f"  - Quality Score: {result.get('quality_score', 0):.2f}")
+        if not embedding_only:
+            print(f"  - Category: {result.get('category', 'N/A')}")
+            print(f"  - Quality Score: {result.get('quality_score', 0):.2f}")
         print(f"  - Processing Time: {result.get('processing_time', 0):.2f}s")
         
         # Check if embedding was stored
@@ -57,9 +68,7 @@ def test_image_embedding(image_path: str):
         
         if orchestrator.embedding_db:
             # Get file_id from result
-            file_id = result.get('file_id') or os.path.splitext(
-                os.path.basename(image_path)
-            )[0]
+            file_id = result.get('file_id') or image.stem
             
             # Try to retrieve from database
             stored_record = orchestrator.embedding_db.get_by_file_id(file_id)
@@ -68,11 +77,12 @@ def test_image_embedding(image_path: str):
                 print("[OK] Record found in database")
                 print(f"  - File ID: {stored_record['file_id']}")
                 print(f"  - File Name: {stored_record['file_name']}")
-                print(f"  - Has Embedding: {'Yes' if stored_record.get('embedding') else 'No'}")
-                print(f"  - Quality Score: {stored_record.get('quality_score', 'N/A')}")
+                print(f"  - Has Embedding: {'Yes' if stored_record.get('embedding') is not None else 'No'}")
+                if not embedding_only:
+                    print(f"  - Quality Score: {stored_record.get('quality_score', 'N/A')}")
                 
-                if stored_record.get('embedding'):
-                    print(f"  - Embedding Dimensions: {len(stored_record['embedding'])}")
+                if stored_record.get('embedding') is not None:
+                    print(f"  - Embedding Dimensions: {stored_record['embedding'].shape[0]}")
                     print("[SUCCESS] Image processed and stored with embedding!")
                 else:
                     print("[INFO] Image stored but without embedding (direct OpenAI key needed)")
@@ -84,16 +94,16 @@ def test_image_embedding(image_path: str):
         # Show some extracted content
         print("\n[4/4] Extracted Content Preview:")
         print("-" * 60)
-        raw_text = result.get('raw_text', '')
+        raw_text = result.get('raw_text', '') or result.get('visual_features', '')
         if raw_text:
             preview = raw_text[:200] + "..." if len(raw_text) > 200 else raw_text
             print(preview)
         else:
             print("(No text content extracted)")
         
-        # Show labels
+        # Show labels (none in embedding-only mode)
         labels = result.get('labels', {})
-        if labels:
+        if labels and not embedding_only:
             print("\nLabels:")
             for key, value in labels.items():
                 if isinstance(value, dict):
@@ -130,6 +140,8 @@ def test_similarity_search():
         return True
     
     try:
+        from utils.database import EmbeddingDatabase
+        
         db = EmbeddingDatabase(
             connection_string=Config.SUPABASE_DB_URL,
             openai_api_key=embedding_key
@@ -173,6 +185,11 @@ if __name__ == '__main__':
         default='test_data/reactions/310000688522.png',
         help='Path to image file to process'
     )
+    parser.add_argument(
+        '--full-pipeline',
+        action='store_true',
+        help='Run LLM labeling and quality scoring too (slower; default is embedding only)'
+    )
     parser.add_argument(
         '--search',
         action='store_true',
@@ -181,6 +198,9 @@ if __name__ == '__main__':
     
     args = parser.parse_args()
     
+    # Flushed by sys.exit below
+    sys.stdout.reconfigure(line_buffering=False, write_through=False)
+    
     print("\n")
     print("Image Embedding Test")
     print("=" * 60)
@@ -191,7 +211,7 @@ if __name__ == '__main__':
     print("\n")
     
     # Process image
-    success = test_image_embedding(args.image_path)
+    success = test_image_embedding(args.image_path, embedding_only=not args.full_pipeline)
     
     # Test similarity search if requested
     if args.search and success: